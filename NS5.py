@@ -1,5 +1,5 @@
-import subprocess
-import sys
+from dependency_manager import ensure_packages
+from sql_normalizer import format_sql
 
 # List of required packages:
 # required_packages = ["pandas", "numpy", "matplotlib", "seaborn", "scipy", "statsmodels", "sklearn", "xgboost", "lightgbm", "catboost", "tensorflow", "keras"]
@@ -7,15 +7,13 @@ required_packages = ["pandas", "numpy", "matplotlib", "seaborn", "scipy", "stats
 
 def installPackages(packages):
     """
-    Importing the required packages in this function and checking if they are already installed. If not, this function will install them using the subprocess module.
+    Checking if the required packages are already installed (from package metadata, without importing them). Missing packages are installed together in a single pip call. The check is skipped when the environment has not changed since the last successful run.
     """
-    for package in packages:
-        try:
-            __import__(package)
-            print(f"{package} already installed.")
-        except ImportError:
-            print(f"Installing {package}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+    missing = ensure_packages(packages)
+    if missing:
+        print(f"Installed {', '.join(missing)}.")
+    else:
+        print("All required packages already installed.")
 
 # Importing the required packages
 
@@ -48,7 +46,6 @@ try:
     from selenium.webdriver.edge.service import Service
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC    
-    from sql_formatter.core import format_sql
 except ImportError as e:
     print(f"Error: {e}")
     print("Installing required packages...")
@@ -164,7 +161,7 @@ def listAccounts():
 
 def formatSql(query):
     """
-    Format the SQL query using the sql_formatter package.
+    Format the SQL query using the sql_formatter package. Results are memoized (see sql_normalizer), so repeated queries are only formatted once.
     """
     formatted_sql = format_sql(query)
     return formatted_sql
@@ -8,28 +8,99 @@ Description: This script automates various tasks such as package installation, c
 
 import os
 import sys
+import time
 import logging
-import subprocess
+import threading
+import tempfile
+import importlib
+import functools
+import contextvars
 import configparser
-from importlib.util import find_spec
+from urllib.parse import urlparse
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-# Third-party imports (lazy-loaded to avoid unnecessary imports)
-try:
-    import pandas as pd
-    import numpy as np
-    import cx_Oracle
-    import pyodbc
-    from sqlalchemy import create_engine
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.common.keys import Keys
-    from selenium.webdriver.edge.service import Service
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from sql_formatter.core import format_sql
-except ImportError as e:
-    logging.error(f"Import error: {e}")
-    sys.exit(1)
+from db_pool import get_pool, DEFAULT_BORROW_TIMEOUT
+from dependency_manager import ensure_packages, WHEELHOUSE
+from credential_store import shift_encrypt, shift_decrypt
+from instrumentation import instrument, instrument_methods, measure_data
+from resilience import (DB_POLICY, BROWSER_POLICY, retry_call, retry_stream, bounded, remaining, query_timeout,
+                        is_retryable, is_session_lost)
+
+class LazyImport:
+    """
+    Stand-in for a module (or a name inside a module) that is imported on first use.
+
+    Importing this script stays fast, and a missing optional package only raises an
+    ImportError when the feature that needs it is actually used.
+    """
+    def __init__(self, module_name, attribute=None, feature=None):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._feature = feature or module_name
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            try:
+                module = importlib.import_module(self._module_name)
+            except ImportError as e:
+                raise ImportError(f"{self._feature} requires '{self._module_name}': {e}") from e
+            self._target = getattr(module, self._attribute) if self._attribute else module
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy {self._module_name}{'.' + self._attribute if self._attribute else ''}>"
+
+# Third-party imports (loaded on first use, per subsystem)
+# Data processing / Excel
+pd = LazyImport("pandas", feature="Data processing")
+np = LazyImport("numpy", feature="Data processing")
+# Web automation
+webdriver = LazyImport("selenium.webdriver", feature="Web automation")
+By = LazyImport("selenium.webdriver.common.by", "By", feature="Web automation")
+Keys = LazyImport("selenium.webdriver.common.keys", "Keys", feature="Web automation")
+Service = LazyImport("selenium.webdriver.edge.service", "Service", feature="Web automation")
+WebDriverWait = LazyImport("selenium.webdriver.support.ui", "WebDriverWait", feature="Web automation")
+EC = LazyImport("selenium.webdriver.support.expected_conditions", feature="Web automation")
+TimeoutException = LazyImport("selenium.common.exceptions", "TimeoutException", feature="Web automation")
+# SQL formatting
+format_sql = LazyImport("sql_normalizer", "format_sql", feature="SQL formatting")  # memoized sql_formatter
+# Database drivers (pyodbc, cx_Oracle, SQLAlchemy) are imported by db_pool when a server is first used.
+
+# browser -> (options class, driver class, driver service class) in selenium.webdriver
+BROWSERS = {
+    "edge": ("EdgeOptions", "Edge", Service),
+    "chrome": ("ChromeOptions", "Chrome",
+               LazyImport("selenium.webdriver.chrome.service", "Service", feature="Web automation")),
+    "firefox": ("FirefoxOptions", "Firefox",
+                LazyImport("selenium.webdriver.firefox.service", "Service", feature="Web automation")),
+}
+BROWSERS["chromium"] = BROWSERS["chrome"]  # pass binary_path if Chromium is not the default Chrome binary
+
+# Driver performance profiles; explicit WebDriverManager arguments override the profile's values
+DRIVER_PROFILES = {
+    "default": {"page_load_strategy": "normal", "block": (), "poll_frequency": 0.5},
+    # get() returns at DOMContentLoaded; images, web fonts and ad/analytics requests are not loaded
+    "fast": {"page_load_strategy": "eager", "block": ("images", "fonts", "ads"), "poll_frequency": 0.05},
+    # get() returns as soon as navigation starts; pair with wait_for_element
+    "minimal": {"page_load_strategy": "none", "block": ("images", "fonts", "ads"), "poll_frequency": 0.05},
+}
+# Request URL patterns blocked per resource type (Chromium-based browsers, through DevTools)
+BLOCKED_URL_PATTERNS = {
+    "images": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico"],
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "ads": ["*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*", "*adservice.google.*",
+            "*google-analytics.com*", "*googletagmanager.com*", "*facebook.net*", "*adnxs.com*",
+            "*scorecardresearch.com*", "*hotjar.com*"],
+}
 
 # Constants
 REQUIRED_PACKAGES = [
@@ -38,117 +109,497 @@ REQUIRED_PACKAGES = [
 ]
 CONFIG_FILE = r"C:\Users\nihal\Prod\Python\script\pyconfig.ini"
 OUTPUT_DIR = r"C:\Users\nihal\Prod\Python\output"
+EDGE_DRIVER_PATH = "drivers/msedgedriver.exe"
+DEFAULT_PAGE_LOAD_TIMEOUT = 300  # seconds; Selenium's own default
+DEFAULT_LOCK_TIMEOUT = 30  # seconds to wait for another job's lock on the config file
+DEFAULT_CHUNK_ROWS = 50000  # rows per DataFrame when streaming query results
+DEFAULT_ARRAYSIZE = 5000  # rows fetched per driver round-trip when streaming
+DEFAULT_WRITE_BATCH_ROWS = 10000  # rows per executemany call in write_records
+DEFAULT_BATCH_WORKERS = 8  # threads used by fetch_records_batch
+DEFAULT_SERVER_CONCURRENCY = 4  # concurrent queries per server type in a batch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def install_packages(packages):
-    """Install missing packages using pip."""
-    missing_packages = [pkg for pkg in packages if not find_spec(pkg)]
-    if missing_packages:
-        logging.info(f"Installing missing packages: {', '.join(missing_packages)}")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", *missing_packages])
-    else:
-        logging.info("All required packages are already installed.")
+def install_packages(packages, wheelhouse=None, offline=None):
+    """
+    Install missing packages using a single pip call.
+
+    Presence is checked from package metadata, and the check is skipped entirely while the
+    interpreter and site-packages are unchanged since the last successful run (see dependency_manager).
+    """
+    return ensure_packages(packages, wheelhouse=wheelhouse or WHEELHOUSE, offline=offline)
 
+@contextmanager
+def file_lock(path, timeout=DEFAULT_LOCK_TIMEOUT):
+    """Hold an exclusive OS-level lock on `path + '.lock'`; released automatically if the process dies."""
+    lock_file = open(path + ".lock", "a+")
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not lock {path} within {timeout}s")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
+
+@instrument_methods("config", exclude=("batch",))
 class ConfigManager:
-    """Manages configuration file operations."""
-    def __init__(self, config_file):
+    """
+    Manages configuration file operations.
+
+    The file is parsed once and kept in memory; it is only re-parsed when its mtime or size
+    changes on disk. Every write goes to a temporary file that replaces the config atomically,
+    under a file lock so concurrent jobs do not clobber each other. Use batch() to apply many
+    changes with a single write.
+
+    Pass a credential_store backend (e.g. SQLiteBackend, EncryptedBackend) to store the
+    passwords there instead of in the INI file.
+    """
+    def __init__(self, config_file, lock_timeout=DEFAULT_LOCK_TIMEOUT, backend=None):
         self.config_file = config_file
+        self.lock_timeout = lock_timeout
+        self.backend = backend
         self.config = configparser.ConfigParser()
-        if not os.path.exists(self.config_file):
+        self._signature = None  # (mtime, size) of the file the in-memory view was parsed from
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty = False
+        if backend is None and not os.path.exists(self.config_file):
             self._create_default_config()
 
     def _create_default_config(self):
         """Create a default config file if it doesn't exist."""
-        self.config["DEFAULT"] = {"password": "password"}
-        with open(self.config_file, "w") as configfile:
-            self.config.write(configfile)
+        with self._locked():
+            if os.path.exists(self.config_file):
+                return
+            self.config["DEFAULT"] = {"password": "password"}
+            self._write()
         logging.info(f"Config file created at {self.config_file}")
 
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.config_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        """Re-parse the config file if it changed on disk since it was last read."""
+        if self._batch_depth:
+            return  # inside a batch the in-memory view is authoritative
+        signature = self._file_signature()
+        if signature != self._signature:
+            config = configparser.ConfigParser()
+            config.read(self.config_file)
+            self.config = config
+            self._signature = signature
+
+    def _write(self):
+        """Write the in-memory view atomically (temp file + rename), or defer it inside a batch."""
+        if self._batch_depth:
+            self._dirty = True
+            return
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        fd, tmp_path = tempfile.mkstemp(prefix=".pyconfig_", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as configfile:
+                self.config.write(configfile)
+                configfile.flush()
+                os.fsync(configfile.fileno())
+            os.replace(tmp_path, self.config_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._signature = self._file_signature()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the thread and file locks and an up-to-date view for a read-modify-write."""
+        with self._lock:
+            if self._batch_depth:
+                yield  # the batch already holds the file lock
+                return
+            with file_lock(self.config_file, self.lock_timeout):
+                self._refresh()
+                yield
+
+    @contextmanager
+    def batch(self):
+        """
+        Apply many changes with one locked, atomic write.
+
+        Changes made inside the with block are written once when it exits, or discarded if
+        it raises.
+        """
+        if self.backend is not None:
+            with self.backend.batch():
+                yield self
+            return
+        with self._locked():
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._dirty = False
+                    self._signature = None  # drop the uncommitted changes on next read
+                raise
+            self._batch_depth -= 1
+            if not self._batch_depth and self._dirty:
+                self._dirty = False
+                self._write()
+
     def encrypt_password(self, password):
         """Encrypt the password using a simple substitution cipher."""
-        return "".join([chr(ord(char) + 1) for char in password])
+        return shift_encrypt(password)
 
     def decrypt_password(self, encrypted):
         """Decrypt the password using a simple substitution cipher."""
-        return "".join([chr(ord(char) - 1) for char in encrypted])
+        return shift_decrypt(encrypted)
 
     def add_password(self, account, password):
         """Add a password for the specified account."""
-        self.config.read(self.config_file)
-        self.config[account] = {"password": self.encrypt_password(password)}
-        with open(self.config_file, "w") as configfile:
-            self.config.write(configfile)
+        if self.backend is not None:
+            self.backend.set(account, password)
+        else:
+            with self._locked():
+                self.config[account] = {"password": self.encrypt_password(password)}
+                self._write()
         logging.info(f"Password added for account: {account}")
 
     def read_password(self, account):
         """Read the password for the specified account."""
-        self.config.read(self.config_file)
-        if account not in self.config:
-            logging.warning(f"Account '{account}' not found in config file.")
-            return None
-        return self.decrypt_password(self.config[account]["password"])
+        if self.backend is not None:
+            password = self.backend.get(account)
+            if password is None:
+                logging.warning(f"Account '{account}' not found in credential store.")
+            return password
+        with self._lock:
+            self._refresh()
+            if account not in self.config:
+                logging.warning(f"Account '{account}' not found in config file.")
+                return None
+            return self.decrypt_password(self.config[account]["password"])
 
     def remove_password(self, account):
         """Remove the password for the specified account."""
-        self.config.read(self.config_file)
-        if account not in self.config:
-            logging.warning(f"Account '{account}' not found in config file.")
-            return False
-        self.config.remove_section(account)
-        with open(self.config_file, "w") as configfile:
-            self.config.write(configfile)
+        if self.backend is not None:
+            if not self.backend.delete(account):
+                logging.warning(f"Account '{account}' not found in credential store.")
+                return False
+            logging.info(f"Password removed for account: {account}")
+            return True
+        with self._locked():
+            if account not in self.config:
+                logging.warning(f"Account '{account}' not found in config file.")
+                return False
+            self.config.remove_section(account)
+            self._write()
         logging.info(f"Password removed for account: {account}")
         return True
 
     def update_password(self, account, password):
         """Update the password for the specified account."""
-        self.config.read(self.config_file)
-        if account not in self.config:
-            logging.warning(f"Account '{account}' not found in config file.")
-            return False
-        self.config[account] = {"password": self.encrypt_password(password)}
-        with open(self.config_file, "w") as configfile:
-            self.config.write(configfile)
+        if self.backend is not None:
+            with self.backend.batch():
+                if not self.backend.exists(account):
+                    logging.warning(f"Account '{account}' not found in credential store.")
+                    return False
+                self.backend.set(account, password)
+            logging.info(f"Password updated for account: {account}")
+            return True
+        with self._locked():
+            if account not in self.config:
+                logging.warning(f"Account '{account}' not found in config file.")
+                return False
+            self.config[account] = {"password": self.encrypt_password(password)}
+            self._write()
         logging.info(f"Password updated for account: {account}")
         return True
 
     def list_accounts(self):
         """List all accounts in the config file."""
-        self.config.read(self.config_file)
-        return self.config.sections()
-
-def fetch_records(query, server_type):
-    """Fetch records from the database based on the server type."""
-    if server_type == "SSMS":
-        conn_str = (
-            r"Driver={SQL Server};"
-            r"Server=your_server_name;"
-            r"Database=your_database_name;"
-            r"Trusted_Connection=yes;"
-        )
-        conn = pyodbc.connect(conn_str)
-    elif server_type == "Oracle":
-        conn = cx_Oracle.connect("username/password@hostname:port/SID")
-    elif server_type == "DP3":
-        engine = create_engine("your_dp3_connection_string")
-        conn = engine.connect()
+        if self.backend is not None:
+            return self.backend.accounts()
+        with self._lock:
+            self._refresh()
+            return self.config.sections()
+
+def _shrinker(query, server_type, optimize):
+    """Return a function applying dtype_optimizer.shrink with the query's cached schema."""
+    from dtype_optimizer import shrink
+    from query_cache import cache_key
+    key = cache_key(query, server_type)
+    options = optimize if isinstance(optimize, dict) else {}
+    return lambda df: shrink(df, key=key, **options)
+
+def _read_sql(query, server_type):
+    """Run a query on a pooled connection, with the borrow and query timeouts bounded by the deadline."""
+    with get_pool(server_type).connection(timeout=bounded(DEFAULT_BORROW_TIMEOUT)) as conn, query_timeout(conn):
+        return pd.read_sql(query, conn)
+
+@instrument("fetch_records")
+def fetch_records(query, server_type, chunksize=None, arraysize=None, cache=None, optimize=False,
+                  retry_policy=DB_POLICY):
+    """
+    Fetch records from the database based on the server type, using a pooled connection.
+
+    If chunksize is given, a generator of DataFrames with at most chunksize rows is returned
+    instead of a single DataFrame, so memory stays flat however large the result set is.
+    If a QueryCache is given, unexpired cached results are returned without querying the database.
+    Streamed results are not cached, so cache cannot be combined with chunksize.
+    With optimize=True (or a dict of dtype_optimizer.infer_schema options) the result is shrunk to
+    compact dtypes, using a schema cached per query after the first run. Streamed chunks get
+    categoricals with their own categories; concatenate them with union_categoricals.
+
+    Transient errors (dropped connections, listener failures, deadlocks) are retried under
+    retry_policy and the "db.<server_type>" circuit breaker (see resilience.py); pass
+    resilience.NO_RETRY to fail at once. A stream is only retried until its first chunk arrives.
+    """
+    if chunksize and cache is not None:
+        raise ValueError("cache cannot be used with chunksize: streamed results are not cached")
+    target = f"db.{server_type}"
+    if chunksize:
+        chunks = retry_stream(lambda: stream_records(query, server_type, chunksize, arraysize), target,
+                              retry_policy, operation="fetch_records")
+        if optimize:
+            shrink = _shrinker(query, server_type, optimize)
+            return (shrink(chunk) for chunk in chunks)
+        return chunks
+    df = None if cache is None else cache.get(query, server_type)
+    if df is not None:
+        logging.info(f"Cache hit for {server_type} query")
+    else:
+        df = retry_call(lambda: _read_sql(query, server_type), target, retry_policy, operation="fetch_records")
+        if cache is not None:
+            cache.put(query, server_type, df)  # the raw frame: optimize applies per call, hit or miss
+    if optimize:
+        df = _shrinker(query, server_type, optimize)(df)
+    return df
+
+def stream_records(query, server_type, chunksize=DEFAULT_CHUNK_ROWS, arraysize=None):
+    """Yield the result of a query as DataFrames of at most chunksize rows."""
+    with get_pool(server_type).connection() as conn:
+        if hasattr(conn, "exec_driver_sql"):
+            # SQLAlchemy: ask the dialect for a server-side cursor
+            result = conn.exec_driver_sql(
+                query, execution_options={"stream_results": True, "max_row_buffer": chunksize}
+            )
+            columns = list(result.keys())
+            fetch, close = result.fetchmany, result.close
+        else:
+            cursor = conn.cursor()
+            cursor.arraysize = arraysize or min(chunksize, DEFAULT_ARRAYSIZE)
+            cursor.execute(query)
+            columns = [col[0] for col in cursor.description]
+            fetch, close = cursor.fetchmany, cursor.close
+        try:
+            while True:
+                rows = fetch(chunksize)
+                if not rows:
+                    break
+                if not isinstance(rows[0], tuple):
+                    rows = [tuple(row) for row in rows]
+                yield pd.DataFrame.from_records(rows, columns=columns)
+        finally:
+            close()
+
+def _placeholders(conn, count):
+    """Return the bind placeholders for the DB-API paramstyle of a driver or SQLAlchemy connection."""
+    dialect = getattr(conn, "dialect", None)
+    if dialect is not None:
+        paramstyle = dialect.paramstyle
     else:
-        raise ValueError("Unsupported server type")
+        driver = sys.modules.get(type(conn).__module__.split(".")[0])
+        paramstyle = getattr(driver, "paramstyle", "qmark")
+    if paramstyle in ("named", "numeric"):
+        return ", ".join(f":{i + 1}" for i in range(count))  # cx_Oracle positional binds
+    if paramstyle in ("format", "pyformat"):
+        return ", ".join(["%s"] * count)
+    return ", ".join(["?"] * count)
+
+def _python_value(value):
+    """Convert a pandas/NumPy scalar (Timestamp, Timedelta, np.int64, ...) to the Python type drivers bind."""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, pd.Timedelta):
+        return value.to_pytimedelta()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _batch_rows(df):
+    """Convert a DataFrame slice to a list of plain Python tuples, with NaN/NaT as None."""
+    columns = []
+    for _, series in df.items():
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = np.array(series.dt.to_pydatetime(), dtype=object)
+        elif isinstance(series.dtype, np.dtype) and series.dtype != object:
+            values = series.to_numpy().astype(object)  # NumPy yields Python int/float/bool here
+        else:
+            values = np.array([_python_value(value) for value in series.to_numpy(dtype=object)], dtype=object)
+        values[series.isna().to_numpy()] = None
+        columns.append(values)
+    return list(zip(*columns)) if columns else [()] * len(df)
 
+@instrument("write_records")
+def write_records(dataframes, table, server_type, batch_size=DEFAULT_WRITE_BATCH_ROWS):
+    """
+    Bulk insert a DataFrame (or an iterable of DataFrame chunks) into an existing table.
+
+    Uses the fast path of each driver: pyodbc fast_executemany, cx_Oracle array binding
+    through executemany, and SQLAlchemy executemany inserts for DP3. The whole load runs in
+    one transaction and is rolled back on any error. Returns rows, seconds and rows_per_sec.
+    """
+    start = time.perf_counter()
+    rows_written = 0
+    with get_pool(server_type).connection() as conn:
+        is_sqlalchemy = hasattr(conn, "exec_driver_sql")
+        cursor = None if is_sqlalchemy else conn.cursor()
+        if cursor is not None and hasattr(cursor, "fast_executemany"):
+            cursor.fast_executemany = True
+        try:
+            for chunk in _iter_frames(dataframes):
+                columns = [str(col) for col in chunk.columns]
+                if is_sqlalchemy:
+                    from sqlalchemy import table as sa_table, column as sa_column
+                    statement = sa_table(table, *[sa_column(col) for col in columns]).insert()
+                else:
+                    statement = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                                 f"VALUES ({_placeholders(conn, len(columns))})")
+                for offset in range(0, len(chunk), batch_size):
+                    rows = _batch_rows(chunk.iloc[offset:offset + batch_size])
+                    if is_sqlalchemy:
+                        conn.execute(statement, [dict(zip(columns, row)) for row in rows])
+                    else:
+                        cursor.executemany(statement, rows)
+                    rows_written += len(rows)
+            conn.commit()
+        finally:
+            if cursor is not None:
+                cursor.close()
+    seconds = time.perf_counter() - start
+    rows_per_sec = rows_written / seconds if seconds else float("inf")
+    logging.info(f"Inserted {rows_written} rows into {table} in {seconds:.2f}s ({rows_per_sec:,.0f} rows/s)")
+    return {"rows": rows_written, "seconds": seconds, "rows_per_sec": rows_per_sec}
+
+BatchResult = namedtuple("BatchResult", ["query", "server_type", "df", "error", "elapsed"])
+
+@instrument("fetch_records_batch", measure=lambda results, *args, **kwargs: (
+    sum(len(result.df) for result in results if result.df is not None), None))
+def fetch_records_batch(jobs, max_workers=DEFAULT_BATCH_WORKERS, server_limits=None, timeout=None):
+    """
+    Run independent (query, server_type) jobs concurrently and return a BatchResult per job.
+
+    Results are in submission order. Each server type runs at most server_limits[server_type]
+    queries at once (DEFAULT_SERVER_CONCURRENCY otherwise). A job that fails, or runs longer than
+    timeout seconds, gets its exception in `error` without affecting the other jobs. Timed-out
+    queries cannot be interrupted and keep their worker thread until the driver returns. Jobs
+    run in the caller's context, so an enclosing resilience.deadline applies to each of them.
+    """
+    server_limits = server_limits or {}
+    limits = {
+        server_type: threading.BoundedSemaphore(server_limits.get(server_type, DEFAULT_SERVER_CONCURRENCY))
+        for _, server_type in jobs
+    }
+    started = {}
+    results = [None] * len(jobs)
+
+    def run(idx, query, server_type):
+        with limits[server_type]:
+            started[idx] = time.monotonic()
+            df = fetch_records(query, server_type)
+            return df, time.monotonic() - started[idx]
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch_batch")
     try:
-        df = pd.read_sql(query, conn)
-        return df
+        pending = {
+            executor.submit(contextvars.copy_context().run, run, idx, query, server_type): idx
+            for idx, (query, server_type) in enumerate(jobs)
+        }
+        while pending:
+            done, _ = wait(pending, timeout=None if timeout is None else 0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = pending.pop(future)
+                query, server_type = jobs[idx]
+                try:
+                    df, elapsed = future.result()
+                    results[idx] = BatchResult(query, server_type, df, None, elapsed)
+                except Exception as e:
+                    logging.error(f"Batch job {idx} on {server_type} failed: {e}")
+                    elapsed = time.monotonic() - started.get(idx, time.monotonic())
+                    results[idx] = BatchResult(query, server_type, None, e, elapsed)
+            if timeout is not None:
+                now = time.monotonic()
+                for future, idx in list(pending.items()):
+                    if idx in started and now - started[idx] > timeout:
+                        del pending[future]
+                        query, server_type = jobs[idx]
+                        logging.error(f"Batch job {idx} on {server_type} timed out after {timeout}s")
+                        error = TimeoutError(f"Query exceeded {timeout}s")
+                        results[idx] = BatchResult(query, server_type, None, error, now - started[idx])
     finally:
-        conn.close()
+        executor.shutdown(wait=False)
+    failed = sum(result.error is not None for result in results)
+    logging.info(f"Batch finished: {len(results) - failed} succeeded, {failed} failed")
+    return results
 
-def create_excel(dataframes, path):
-    """Create an Excel file from a list of dataframes."""
+def _iter_frames(data):
+    """Yield the DataFrames of one sheet, given either a DataFrame or an iterable of chunks."""
+    if isinstance(data, pd.DataFrame):
+        yield data
+    else:
+        yield from data
+
+def _excel_measure(result, dataframes, path, *args, **kwargs):
+    """Rows written (fast mode only) and the size of the workbook, for instrumentation."""
+    rows = measure_data(result)[0]
+    return rows, os.path.getsize(path) if os.path.exists(path) else None
+
+@instrument("create_excel", measure=_excel_measure)
+def create_excel(dataframes, path, sheet_names=None, fast=False, engine=None, time_budget=None):
+    """
+    Create an Excel file from a list of dataframes (or iterables of dataframe chunks).
+
+    With fast=True rows are streamed through excel_writer (XlsxWriter constant-memory or openpyxl
+    write-only mode), which keeps memory bounded and splits sheets past Excel's row limit; a
+    warning is logged if that takes longer than time_budget seconds. For files read by programs
+    rather than people, use exporters.export (Parquet, Feather or CSV).
+    """
+    if fast:
+        from excel_writer import write_excel_fast
+        return write_excel_fast(dataframes, path, sheet_names=sheet_names, engine=engine, time_budget=time_budget)
     with pd.ExcelWriter(path, engine="openpyxl") as writer:
-        for idx, df in enumerate(dataframes):
-            sheet_name = f"Sheet{idx + 1}"
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
+        for idx, data in enumerate(dataframes):
+            sheet_name = sheet_names[idx] if sheet_names else f"Sheet{idx + 1}"
+            startrow = 0
+            for chunk in _iter_frames(data):
+                chunk.to_excel(writer, sheet_name=sheet_name, index=False,
+                               header=startrow == 0, startrow=startrow)
+                startrow += len(chunk) + (1 if startrow == 0 else 0)
     logging.info(f"Excel file created at {path}")
 
 def random_data(n):
@@ -156,37 +607,300 @@ def random_data(n):
     data = np.random.randn(n, 4)
     return pd.DataFrame(data, columns=list("ABCD"))
 
+def _css_string(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+# Locator strategies that can be resolved inside the page by the bulk element scripts
+_JS_LOCATORS = {
+    "css selector": lambda value: ("css", value),
+    "xpath": lambda value: ("xpath", value),
+    "id": lambda value: ("css", '[id="%s"]' % _css_string(value)),
+    "name": lambda value: ("css", '[name="%s"]' % _css_string(value)),
+    "class name": lambda value: ("css", "." + value),
+    "tag name": lambda value: ("css", value),
+}
+
+# Prepended to the bulk element scripts: locate(kind, value) returns an array of elements
+_JS_LOCATE = """
+var locate = function (kind, value) {
+    if (kind === "xpath") {
+        var snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var nodes = [];
+        for (var i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+        return nodes;
+    }
+    return Array.prototype.slice.call(document.querySelectorAll(value));
+};
+var textOf = function (el) { return (el.innerText || el.textContent || "").trim(); };
+"""
+
+_JS_WAIT_FOR_ELEMENT = _JS_LOCATE + """
+var done = arguments[arguments.length - 1], kind = arguments[0], value = arguments[1];
+var found = locate(kind, value)[0];
+if (found) { done(found); return; }
+var timer, observer = new MutationObserver(function () {
+    var el = locate(kind, value)[0];
+    if (el) { observer.disconnect(); clearTimeout(timer); done(el); }
+});
+observer.observe(document, {childList: true, subtree: true, attributes: true});
+timer = setTimeout(function () { observer.disconnect(); done(null); }, arguments[2]);
+"""
+
+# Navigation Timing of the current page, in milliseconds from the start of navigation
+_JS_PAGE_TIMING = """
+var nav = performance.getEntriesByType("navigation")[0];
+if (!nav) return null;
+return {ttfb_ms: nav.responseStart - nav.requestStart, dom_content_loaded_ms: nav.domContentLoadedEventEnd,
+        load_ms: nav.loadEventEnd, transfer_bytes: nav.transferSize || 0,
+        resources: performance.getEntriesByType("resource").length};
+"""
+
+_JS_GET_TEXTS = _JS_LOCATE + """
+return locate(arguments[0], arguments[1]).map(textOf);
+"""
+
+_JS_EXTRACT_TABLE = _JS_LOCATE + """
+var table = locate(arguments[0], arguments[1])[0];
+if (!table) return null;
+var rows = [];
+for (var r = 0; r < table.rows.length; r++) {
+    var cells = table.rows[r].cells, values = [], header = table.rows[r].parentNode.tagName === "THEAD";
+    for (var c = 0; c < cells.length; c++) values.push(textOf(cells[c]));
+    if (!header && cells.length) {
+        header = Array.prototype.every.call(cells, function (cell) { return cell.tagName === "TH"; });
+    }
+    rows.push([header, values]);
+}
+return rows;
+"""
+
+_JS_FILL_FORM = _JS_LOCATE + """
+var missing = [];
+arguments[0].forEach(function (field) {
+    var el = locate(field[0], field[1])[0];
+    if (!el) { missing.push(field[1]); return; }
+    if (el.type === "checkbox" || el.type === "radio") el.checked = Boolean(field[2]);
+    else el.value = field[2];
+    el.dispatchEvent(new Event("input", {bubbles: true}));
+    el.dispatchEvent(new Event("change", {bubbles: true}));
+});
+return missing;
+"""
+
+def _js_locator(locator_type, locator_value):
+    """Translate a Selenium (By, value) locator into the (kind, selector) form the bulk scripts use."""
+    try:
+        return _JS_LOCATORS[locator_type](locator_value)
+    except KeyError:
+        raise ValueError(f"Locator type '{locator_type}' is not supported by the bulk element methods") from None
+
+def _element_retryable(error):
+    """Element waits that time out are not retried: the page has already had the whole timeout."""
+    return is_retryable(error) and type(error).__name__ != "TimeoutException"
+
+def _element_call(method):
+    """Retry a WebDriverManager element method on stale elements and lost sessions."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return retry_call(lambda: method(self, *args, **kwargs), self._retry_target(), self.retry_policy,
+                          operation=f"webdriver.{method.__name__}", on_retry=self._recover,
+                          retryable=_element_retryable)
+    return wrapper
+
+@instrument_methods("webdriver")
 class WebDriverManager:
-    """Manages Selenium WebDriver operations."""
-    def __init__(self, driver_path="drivers/msedgedriver.exe"):
+    """
+    Manages Selenium WebDriver operations.
+
+    browser is "edge" (default), "chrome", "chromium" or "firefox". Without a driver_path the
+    Edge driver in drivers/ is used if present, otherwise Selenium Manager finds the driver.
+
+    profile picks a DRIVER_PROFILES entry ("default", "fast" or "minimal"). page_load_strategy,
+    block (resource types from BLOCKED_URL_PATTERNS) and poll_frequency (seconds between wait
+    checks) override it. With collect_timings, open_url records a timing entry per page (see timing_report).
+
+    Page-load timeouts (set page_load_timeout so a stalled page raises instead of blocking),
+    stale elements and lost browser sessions are retried under retry_policy and a circuit
+    breaker per web host (see resilience.py); a lost session is restarted and its last URL
+    reopened before the retry. Pass resilience.NO_RETRY to fail at once.
+    """
+    def __init__(self, driver_path=None, browser="edge", headless=False, binary_path=None,
+                 extra_arguments=None, profile="default", page_load_strategy=None, block=None,
+                 poll_frequency=None, collect_timings=False, page_load_timeout=None, retry_policy=BROWSER_POLICY):
+        if browser not in BROWSERS:
+            raise ValueError(f"Unsupported browser: {browser}")
+        if profile not in DRIVER_PROFILES:
+            raise ValueError(f"Unknown driver profile: {profile}")
+        settings = DRIVER_PROFILES[profile]
+        if driver_path is None and browser == "edge" and os.path.exists(EDGE_DRIVER_PATH):
+            driver_path = EDGE_DRIVER_PATH
         self.driver_path = driver_path
+        self.browser = browser
+        self.headless = headless
+        self.binary_path = binary_path
+        self.extra_arguments = list(extra_arguments or [])
+        self.page_load_strategy = page_load_strategy or settings["page_load_strategy"]
+        self.block = tuple(settings["block"] if block is None else block)
+        unknown = set(self.block) - set(BLOCKED_URL_PATTERNS)
+        if unknown:
+            raise ValueError(f"Unknown resource type(s) to block: {', '.join(sorted(unknown))}")
+        self.poll_frequency = poll_frequency or settings["poll_frequency"]
+        self.collect_timings = collect_timings
+        self.page_timings = []
+        self.page_load_timeout = page_load_timeout
+        self.retry_policy = retry_policy
+        self.current_url = None
         self.driver = None
 
     def init_driver(self):
-        """Initialize and return an Edge WebDriver."""
-        service = Service(self.driver_path)
-        options = webdriver.EdgeOptions()
-        options.add_argument("--start-maximized")
-        self.driver = webdriver.Edge(service=service, options=options)
+        """Initialize and return a WebDriver for the configured browser."""
+        options_name, driver_name, service_class = BROWSERS[self.browser]
+        options = getattr(webdriver, options_name)()
+        if self.headless:
+            if self.browser == "firefox":
+                options.add_argument("-headless")
+            else:
+                options.add_argument("--headless=new")
+                options.add_argument("--window-size=1920,1080")
+                options.add_argument("--disable-dev-shm-usage")  # small /dev/shm in containers
+        else:
+            options.add_argument("--start-maximized")
+        for argument in self.extra_arguments:
+            options.add_argument(argument)
+        if self.binary_path:
+            options.binary_location = self.binary_path
+        options.page_load_strategy = self.page_load_strategy
+        self._set_block_preferences(options)
+        service = service_class(self.driver_path) if self.driver_path else service_class()
+        self.driver = getattr(webdriver, driver_name)(service=service, options=options)
+        if self.page_load_timeout:
+            self.driver.set_page_load_timeout(self.page_load_timeout)
+        self._block_requests()
         return self.driver
 
+    def restart_driver(self):
+        """Quit the browser (ignoring errors from a dead session) and start a new one."""
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logging.debug(f"Error while quitting the old browser: {e}")
+        return self.init_driver()
+
+    def _retry_target(self, url=None):
+        """Return the circuit breaker target for a URL (or the current page): its host."""
+        return f"web.{urlparse(url or self.current_url or '').netloc or self.browser}"
+
+    def _recover(self, error, reopen=True):
+        """Before a retry: restart a browser whose session died and, with reopen, go back to the last URL."""
+        if not is_session_lost(error):
+            return
+        logging.warning(f"Browser session lost ({type(error).__name__}); restarting the browser")
+        self.restart_driver()
+        if reopen and self.current_url:
+            with self._page_load_deadline():
+                self.driver.get(self.current_url)
+
+    @contextmanager
+    def _page_load_deadline(self):
+        """Lower the page load timeout to the time left before the deadline, for one navigation."""
+        left = remaining()
+        if left is None:
+            yield
+            return
+        self.driver.set_page_load_timeout(max(left, 0.001))
+        try:
+            yield
+        finally:
+            try:
+                self.driver.set_page_load_timeout(self.page_load_timeout or DEFAULT_PAGE_LOAD_TIMEOUT)
+            except Exception as e:
+                logging.debug(f"Could not restore the page load timeout: {e}")
+
+    def _set_block_preferences(self, options):
+        """Turn off images (and web fonts on Firefox) through browser preferences."""
+        if self.browser == "firefox":
+            if "images" in self.block:
+                options.set_preference("permissions.default.image", 2)
+            if "fonts" in self.block:
+                options.set_preference("browser.display.use_document_fonts", 0)
+            if "ads" in self.block:
+                logging.warning("Blocking ad requests is only supported on Chromium-based browsers")
+        elif "images" in self.block:
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+    def _block_requests(self):
+        """Block requests by URL pattern through the DevTools protocol (Chromium-based browsers)."""
+        if self.browser == "firefox" or not self.block:
+            return
+        patterns = [pattern for kind in self.block for pattern in BLOCKED_URL_PATTERNS[kind]]
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        logging.info(f"Blocking {', '.join(self.block)} requests")
+
+    def _wait(self, timeout):
+        return WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency)
+
     def open_url(self, url):
-        """Open the given URL in the browser."""
-        self.driver.get(url)
+        """Open the given URL in the browser, retrying page-load timeouts and lost sessions."""
+        def load():
+            start = time.perf_counter()
+            with self._page_load_deadline():
+                self.driver.get(url)
+            return time.perf_counter() - start
+
+        seconds = retry_call(load, self._retry_target(url), self.retry_policy, operation="webdriver.open_url",
+                             on_retry=lambda error: self._recover(error, reopen=False))
+        self.current_url = url
+        if self.collect_timings:
+            self.record_timing(url, seconds)
         logging.info(f"Opened URL: {url}")
 
+    def page_timing(self):
+        """Return the Navigation Timing figures of the current page (in ms), or None if unavailable."""
+        return self.driver.execute_script(_JS_PAGE_TIMING)
+
+    def record_timing(self, url, get_seconds=None):
+        """Append the current page's timing to page_timings and return the entry."""
+        entry = {"url": url, "get_ms": None if get_seconds is None else get_seconds * 1000}
+        entry.update(self.page_timing() or {})
+        self.page_timings.append(entry)
+        return entry
+
+    def timing_report(self):
+        """Return page_timings as a DataFrame, one row per opened page."""
+        return pd.DataFrame(self.page_timings)
+
+    @_element_call
     def find_element(self, locator_type, locator_value, timeout=10):
         """Find an element using explicit wait."""
-        return WebDriverWait(self.driver, timeout).until(
+        return self._wait(bounded(timeout)).until(
             EC.presence_of_element_located((locator_type, locator_value))
         )
 
+    @_element_call
+    def wait_for_element(self, locator_type, locator_value, timeout=10):
+        """
+        Wait for an element to appear, using a MutationObserver in the page instead of polling.
+
+        Returns as soon as the DOM change that adds the element happens.
+        """
+        timeout = bounded(timeout)
+        self.driver.set_script_timeout(timeout + 5)
+        element = self.driver.execute_async_script(
+            _JS_WAIT_FOR_ELEMENT, *_js_locator(locator_type, locator_value), int(timeout * 1000))
+        if element is None:
+            raise TimeoutException(f"Element {locator_value} did not appear within {timeout}s")
+        return element
+
+    @_element_call
     def click_element(self, locator_type, locator_value):
         """Find and click an element."""
         element = self.find_element(locator_type, locator_value)
         element.click()
         logging.info(f"Clicked on element: {locator_value}")
 
+    @_element_call
     def enter_text(self, locator_type, locator_value, text, clear_first=True):
         """Find an input field and enter text into it."""
         element = self.find_element(locator_type, locator_value)
@@ -195,29 +909,130 @@ class WebDriverManager:
         element.send_keys(text)
         logging.info(f"Entered text '{text}' into {locator_value}")
 
+    @_element_call
     def get_text(self, locator_type, locator_value):
         """Retrieve text from an element."""
         element = self.find_element(locator_type, locator_value)
         return element.text
 
+    @_element_call
     def wait_for_clickable(self, locator_type, locator_value, timeout=10):
         """Wait until an element is clickable."""
-        return WebDriverWait(self.driver, timeout).until(
+        return self._wait(bounded(timeout)).until(
             EC.element_to_be_clickable((locator_type, locator_value))
         )
 
+    @_element_call
     def scroll_to_element(self, locator_type, locator_value):
         """Scroll the page to make an element visible."""
         element = self.find_element(locator_type, locator_value)
         self.driver.execute_script("arguments[0].scrollIntoView();", element)
         logging.info(f"Scrolled to element: {locator_value}")
 
+    @_element_call
+    def get_texts(self, locator_type, locator_value):
+        """Return the text of every matching element, read with a single script call."""
+        return self.driver.execute_script(_JS_GET_TEXTS, *_js_locator(locator_type, locator_value))
+
+    @_element_call
+    def extract_table(self, locator_type, locator_value, header=True):
+        """
+        Read an HTML table into a DataFrame with a single script call.
+
+        With header=True the header row (a <thead> row or a row of <th> cells) supplies the
+        column names. Cells are returned as text.
+        """
+        rows = self.driver.execute_script(_JS_EXTRACT_TABLE, *_js_locator(locator_type, locator_value))
+        if rows is None:
+            raise ValueError(f"No table found for {locator_value}")
+        columns = None
+        if header and rows and rows[0][0]:
+            columns = rows[0][1]
+            rows = rows[1:]
+        data = [values for is_header, values in rows if not (header and is_header)]
+        width = max([len(values) for values in data] + [len(columns or [])])
+        if columns is not None and len(columns) < width:
+            columns = columns + [f"column_{idx}" for idx in range(len(columns), width)]
+        return pd.DataFrame(data, columns=columns)
+
+    @_element_call
+    def fill_form(self, mapping):
+        """
+        Set many form fields with a single script call; return the locators that matched nothing.
+
+        mapping keys are CSS selectors or (locator_type, locator_value) tuples. Checkboxes and radio
+        buttons are checked for truthy values; other fields get the value as text. input and change
+        events are fired for each field, but no key events, so use enter_text where a page listens
+        for key presses.
+        """
+        fields = []
+        for locator, value in mapping.items():
+            kind, selector = _js_locator(*locator) if isinstance(locator, tuple) else ("css", locator)
+            fields.append([kind, selector, value if isinstance(value, bool) else str(value)])
+        missing = self.driver.execute_script(_JS_FILL_FORM, fields)
+        if missing:
+            logging.warning(f"Form fields not found: {', '.join(missing)}")
+        logging.info(f"Filled {len(fields) - len(missing)} form field(s)")
+        return missing
+
     def close_driver(self):
         """Close the WebDriver."""
         if self.driver:
             self.driver.quit()
             logging.info("Browser closed.")
 
+class AsyncWebDriverManager:
+    """
+    asyncio interface to a WebDriverManager.
+
+    Every WebDriverManager method is available as a coroutine. Calls run on a thread owned by
+    this session, in the order they were made, so many sessions can be driven from one event loop:
+
+        sessions = [AsyncWebDriverManager(browser="chrome", headless=True) for _ in range(4)]
+        await asyncio.gather(*(session.init_driver() for session in sessions))
+        tables = await asyncio.gather(*(session.scrape_table(url) for session, url in zip(sessions, urls)))
+    """
+    def __init__(self, manager=None, **manager_kwargs):
+        self.manager = manager or WebDriverManager(**manager_kwargs)
+        # WebDriver sessions are not thread-safe; one thread per session keeps calls in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="webdriver")
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(manager, *args, **kwargs) on the session's thread, in the caller's context (deadlines)."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, func, self.manager, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    def __getattr__(self, name):
+        method = getattr(WebDriverManager, name, None)
+        if not callable(method) or name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+    async def scrape_table(self, url, locator_type="tag name", locator_value="table"):
+        """Open a URL and return its first matching table as a DataFrame."""
+        await self.open_url(url)
+        return await self.extract_table(locator_type, locator_value)
+
+    async def close(self):
+        """Quit the browser and stop the session's thread."""
+        try:
+            await self.close_driver()
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        await self.init_driver()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
 if __name__ == "__main__":
     install_packages(REQUIRED_PACKAGES)
     config_manager = ConfigManager(CONFIG_FILE)
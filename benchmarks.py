@@ -0,0 +1,450 @@
+"""
+Script Name: Toolkit Benchmarks
+Description: Benchmark harness for the toolkit's data-processing paths (random_data, unpivot_dataframe,
+             create_excel and the columnar exporters, the Excel read path, fetch_records/write_records on a
+             local SQLite stand-in). Each case runs in a fresh process and records time, peak RSS, throughput
+             and, for cases that write a file, its size. Results are appended to a JSON history file; the
+             compare mode flags regressions between runs. The import-budget mode checks that importing
+             automation_toolkit stays fast and lazy.
+
+Usage:
+    python benchmarks.py run --sizes 10000 100000 [--only fetch_records] [--history bench_history.json]
+    python benchmarks.py compare [--history bench_history.json] [--threshold 0.10]
+    python benchmarks.py import-budget [--budget 0.25]
+    python benchmarks.py list
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import sqlite3
+import argparse
+import platform
+import subprocess
+import tempfile
+import multiprocessing
+from queue import Empty
+from datetime import datetime
+
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_HISTORY = "bench_history.json"
+DEFAULT_THRESHOLD = 0.10  # 10% slower (or larger peak RSS) counts as a regression
+WIDE_COLUMNS = 120  # value columns in the unpivot benchmark frames
+DEFAULT_CASE_TIMEOUT = 1800  # seconds a single case may run before it is killed and recorded as failed
+IMPORT_BUDGET_SECONDS = 0.25  # cold import of automation_toolkit, excluding interpreter start-up
+HEAVY_MODULES = ["pandas", "numpy", "selenium", "sqlalchemy", "pyodbc", "cx_Oracle", "sql_formatter", "openpyxl"]
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """
+    Register a benchmark case.
+
+    The decorated function receives (size, workdir), does any untimed setup and returns
+    (run, rows): run is the zero-argument callable that is timed, rows the number of rows it processes.
+    Cases that write a file may return (run, rows, output_path) to also record the file's size.
+    """
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def _wide_frame(size):
+    import numpy as np
+    import pandas as pd
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    columns = [f"Product_{i // 12}_{months[i % 12]}" for i in range(WIDE_COLUMNS)]
+    df = pd.DataFrame(np.random.default_rng(0).random((size, WIDE_COLUMNS)), columns=columns)
+    df.insert(0, "ID", np.arange(size))
+    return df
+
+def _sqlite_server(workdir, size):
+    """Register a SQLite stand-in server holding a `records` table of size rows."""
+    import db_pool
+    from automation_toolkit import random_data, write_records
+    path = os.path.join(workdir, "bench.db")
+    db_pool.register_server("SQLite", lambda: sqlite3.connect(path, check_same_thread=False))
+    with db_pool.get_pool("SQLite").connection() as conn:
+        conn.execute("DROP TABLE IF EXISTS records")
+        conn.execute("CREATE TABLE records (A REAL, B REAL, C REAL, D REAL)")
+        conn.commit()
+    if size:
+        write_records(random_data(size), "records", "SQLite")
+
+def measure_import(module="automation_toolkit"):
+    """Import a module in a fresh interpreter; return (seconds, heavy modules it pulled in)."""
+    code = (f"import sys, time; start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start); "
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name]
+
+@benchmark("import_toolkit")
+def bench_import_toolkit(size, workdir):
+    return (lambda: measure_import()), 1
+
+@benchmark("random_data")
+def bench_random_data(size, workdir):
+    from automation_toolkit import random_data
+    random_data(1)  # load pandas and NumPy outside the timed run
+    return (lambda: random_data(size)), size
+
+@benchmark("synthetic_data")
+def bench_synthetic_data(size, workdir):
+    from synthetic_data import DEMO_SCHEMA, generate
+    return (lambda: sum(len(chunk) for chunk in generate(DEMO_SCHEMA, size, seed=1))), size
+
+@benchmark("dtype_shrink")
+def bench_dtype_shrink(size, workdir):
+    """Shrink a synthetic frame with a warm schema cache (the inference runs once in setup)."""
+    from dtype_optimizer import SchemaCache, shrink
+    from synthetic_data import DEMO_SCHEMA, generate_frame
+    df = generate_frame(DEMO_SCHEMA, size, seed=1).astype({"customer": object})
+    cache = SchemaCache(os.path.join(workdir, "schemas.json"))
+    shrink(df, key="bench", cache=cache, report=False)
+    return (lambda: shrink(df, key="bench", cache=cache, report=False)), size
+
+@benchmark("sql_format_many")
+def bench_sql_format_many(size, workdir):
+    """Format size generated queries, 10% of them distinct, from a cold cache."""
+    import sql_normalizer
+    distinct = max(size // 10, 1)
+    queries = [f"select id, amount from orders where region = 'R{idx % distinct}' and amount > {idx % distinct}"
+               for idx in range(size)]
+
+    def run():
+        sql_normalizer.clear_cache()
+        return sql_normalizer.format_many(queries)
+    return run, size
+
+@benchmark("unpivot_pandas")
+def bench_unpivot_pandas(size, workdir):
+    from useful_snippets import unpivot_dataframe
+    df = _wide_frame(size)
+    return (lambda: unpivot_dataframe(df, ["ID"], None)), size * WIDE_COLUMNS
+
+@benchmark("unpivot_numpy")
+def bench_unpivot_numpy(size, workdir):
+    from useful_snippets import unpivot_dataframe
+    df = _wide_frame(size)
+    return (lambda: unpivot_dataframe(df, ["ID"], None, engine="numpy",
+                                      name_pattern=r"(?P<product>.+)_(?P<month>[^_]+)")), size * WIDE_COLUMNS
+
+@benchmark("create_excel")
+def bench_create_excel(size, workdir):
+    from automation_toolkit import create_excel, random_data
+    df = random_data(size)
+    path = os.path.join(workdir, "standard.xlsx")
+    return (lambda: create_excel([df], path)), size, path
+
+@benchmark("create_excel_fast")
+def bench_create_excel_fast(size, workdir):
+    from automation_toolkit import create_excel, random_data
+    df = random_data(size)
+    path = os.path.join(workdir, "fast.xlsx")
+    return (lambda: create_excel([df], path, fast=True)), size, path
+
+def _export_orders(size, workdir, file_name, fmt, codec):
+    """Return the callable exporting synthetic orders, streamed in chunks, and the file it writes."""
+    from exporters import export
+    from synthetic_data import DEMO_SCHEMA, generate
+    chunks = list(generate(DEMO_SCHEMA, size, seed=1, chunksize=max(size // 10, 1)))
+    path = os.path.join(workdir, file_name)
+    return (lambda: export([chunks], path, fmt=fmt, codec=codec)), size, path
+
+@benchmark("export_parquet")
+def bench_export_parquet(size, workdir):
+    return _export_orders(size, workdir, "orders.parquet", "parquet", "zstd")
+
+@benchmark("export_feather")
+def bench_export_feather(size, workdir):
+    return _export_orders(size, workdir, "orders.feather", "feather", "zstd")
+
+@benchmark("export_csv_gz")
+def bench_export_csv_gz(size, workdir):
+    return _export_orders(size, workdir, "orders.csv.gz", "csv", "gzip")
+
+@benchmark("export_csv_zst")
+def bench_export_csv_zst(size, workdir):
+    return _export_orders(size, workdir, "orders.csv.zst", "csv", "zstd")
+
+@benchmark("export_read_parquet")
+def bench_export_read_parquet(size, workdir):
+    """Memory-mapped read of two columns of an exported Parquet file."""
+    from exporters import export, read_export
+    from synthetic_data import DEMO_SCHEMA, generate_frame
+    path = os.path.join(workdir, "orders.parquet")
+    export([generate_frame(DEMO_SCHEMA, size, seed=1)], path)
+    return (lambda: read_export(path, columns=["order_id", "amount"])), size
+
+def _workbook(size, workdir):
+    """Return the path of a benchmark workbook, or the xlsb given in BENCH_XLSB."""
+    if os.environ.get("BENCH_XLSB"):
+        return os.environ["BENCH_XLSB"]
+    from automation_toolkit import random_data
+    from excel_writer import write_excel_fast
+    path = os.path.join(workdir, "input.xlsx")
+    write_excel_fast([random_data(size)], path)
+    return path
+
+@benchmark("excel_read")
+def bench_excel_read(size, workdir):
+    from excel_reader import read_excel_chunks
+    path = _workbook(size, workdir)
+    return (lambda: sum(len(chunk) for chunk in read_excel_chunks(path))), size
+
+@benchmark("excel_read_cached")
+def bench_excel_read_cached(size, workdir):
+    from excel_reader import read_excel_chunks, read_excel_fast
+    path = _workbook(size, workdir)
+    read_excel_fast(path, cache=True, cache_dir=workdir)  # writes the sidecar
+    return (lambda: sum(len(chunk) for chunk in read_excel_chunks(path, cache=True, cache_dir=workdir))), size
+
+@benchmark("fetch_records")
+def bench_fetch_records(size, workdir):
+    from automation_toolkit import fetch_records
+    _sqlite_server(workdir, size)
+    return (lambda: fetch_records("SELECT * FROM records", "SQLite")), size
+
+@benchmark("fetch_records_stream")
+def bench_fetch_records_stream(size, workdir):
+    from automation_toolkit import fetch_records
+    _sqlite_server(workdir, size)
+    query = "SELECT * FROM records"
+    return (lambda: sum(len(chunk) for chunk in fetch_records(query, "SQLite", chunksize=20000))), size
+
+@benchmark("fetch_incremental")
+def bench_fetch_incremental(size, workdir):
+    """Refresh an extract of size rows after 1% new rows were appended (the full load happens in setup)."""
+    from automation_toolkit import random_data, write_records
+    from incremental import fetch_incremental
+    _sqlite_server(workdir, size)
+    query = "SELECT rowid AS id, A, B, C, D FROM records"
+    state_dir = os.path.join(workdir, "incremental")
+    fetch_incremental("records", query, "SQLite", "id", "id", state_dir=state_dir)
+    new_rows = random_data(max(size // 100, 1))
+
+    def run():
+        write_records(new_rows, "records", "SQLite")
+        return fetch_incremental("records", query, "SQLite", "id", "id", state_dir=state_dir)
+    return run, size
+
+@benchmark("write_records")
+def bench_write_records(size, workdir):
+    from automation_toolkit import random_data, write_records
+    _sqlite_server(workdir, 0)
+    df = random_data(size)
+    return (lambda: write_records(df, "records", "SQLite")), size
+
+BROWSER_POOL_SIZE = 2
+
+@benchmark("browser_pool")
+def bench_browser_pool(size, workdir):
+    """Scrape size pages from a local static server with a pool of headless browser sessions."""
+    from driver_pool import WebDriverPool, serve_directory
+    for idx in range(10):
+        with open(os.path.join(workdir, f"page{idx}.html"), "w") as f:
+            f.write(f"<html><body><h1>Page {idx}</h1></body></html>")
+    import atexit
+    server = serve_directory(workdir)
+    base_url = server.__enter__()
+    pool = WebDriverPool(size=BROWSER_POOL_SIZE, browser=os.environ.get("BENCH_BROWSER", "chrome")).start()
+    atexit.register(pool.close)
+    urls = [f"{base_url}/page{idx % 10}.html" for idx in range(size)]
+    return (lambda: pool.map(lambda manager: manager.driver.title, urls)), size
+
+CREDENTIAL_LOOKUPS = 1000
+
+def _credential_lookups(manager, size):
+    """Return a callable doing CREDENTIAL_LOOKUPS random read_password calls on a store of size accounts."""
+    import random
+    accounts = [f"account{random.randrange(size)}" for _ in range(CREDENTIAL_LOOKUPS)]
+    return lambda: [manager.read_password(account) for account in accounts]
+
+def _credential_manager(workdir, size, backend=None):
+    from automation_toolkit import ConfigManager
+    manager = ConfigManager(os.path.join(workdir, "pyconfig.ini"), backend=backend)
+    with manager.batch():
+        for idx in range(size):
+            manager.add_password(f"account{idx}", f"password{idx}")
+    return manager
+
+@benchmark("credential_lookup_ini")
+def bench_credential_lookup_ini(size, workdir):
+    return _credential_lookups(_credential_manager(workdir, size), size), CREDENTIAL_LOOKUPS
+
+@benchmark("credential_lookup_sqlite")
+def bench_credential_lookup_sqlite(size, workdir):
+    from credential_store import SQLiteBackend
+    backend = SQLiteBackend(os.path.join(workdir, "credentials.db"))
+    return _credential_lookups(_credential_manager(workdir, size, backend), size), CREDENTIAL_LOOKUPS
+
+@benchmark("credential_lookup_encrypted")
+def bench_credential_lookup_encrypted(size, workdir):
+    from credential_store import EncryptedBackend, generate_key
+    backend = EncryptedBackend(os.path.join(workdir, "credentials.db"), key=generate_key())
+    return _credential_lookups(_credential_manager(workdir, size, backend), size), CREDENTIAL_LOOKUPS
+
+def _peak_rss_mb():
+    """Return the peak resident set size of this process in MB, or None if it cannot be measured."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB elsewhere
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2  # Windows
+    except (ImportError, AttributeError):
+        return None
+
+def _run_case(name, size, repeat, queue):
+    """Run one benchmark case in this (fresh) process and put its result on the queue."""
+    logging.disable(logging.INFO)
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        run, rows, *output = BENCHMARKS[name](size, workdir)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+        queue.put({"name": name, "size": size, "seconds": seconds, "rows": rows,
+                   "rows_per_sec": rows / seconds if seconds else None, "peak_rss_mb": _peak_rss_mb(),
+                   "output_mb": os.path.getsize(output[0]) / 1024 ** 2 if output else None, "error": None})
+    except Exception as e:
+        queue.put({"name": name, "size": size, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def _wait_for_result(process, queue, timeout):
+    """Return a case's result, or an error entry if its process dies or runs past timeout seconds."""
+    end = time.monotonic() + timeout
+    while True:
+        try:
+            return queue.get(timeout=1.0)
+        except Empty:
+            pass
+        if not process.is_alive():
+            try:
+                return queue.get(timeout=1.0)  # put just before the process exited
+            except Empty:
+                return {"error": f"process exited with code {process.exitcode} without a result"}
+        if time.monotonic() > end:
+            process.terminate()
+            return {"error": f"timed out after {timeout}s"}
+
+def run_benchmarks(names=None, sizes=None, repeat=3, timeout=DEFAULT_CASE_TIMEOUT):
+    """
+    Run the selected benchmark cases, each in its own process, and return their results.
+
+    A case whose process crashes (e.g. killed for running out of memory) or runs longer than
+    timeout seconds is recorded as failed and the run moves on to the next case.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for name in names or list(BENCHMARKS):
+        for size in sizes or DEFAULT_SIZES:
+            queue = context.Queue()
+            process = context.Process(target=_run_case, args=(name, size, repeat, queue))
+            process.start()
+            result = {"name": name, "size": size, **_wait_for_result(process, queue, timeout)}
+            process.join()
+            results.append(result)
+            if result["error"]:
+                print(f"{name:28} {size:>10}  ERROR {result['error']}")
+            else:
+                rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+                output = f"  output {result['output_mb']:.1f} MB" if result.get("output_mb") is not None else ""
+                print(f"{name:28} {size:>10}  {result['seconds']:9.3f}s  "
+                      f"{result['rows_per_sec'] or 0:>14,.0f} rows/s  peak RSS {rss}{output}")
+    return results
+
+def load_history(path):
+    """Load the list of previous runs from a history file."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def save_run(path, results):
+    """Append a run to the history file."""
+    history = load_history(path)
+    history.append({
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    })
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+
+def compare_runs(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Return (name, size, metric, before, after, change) for every case that regressed past threshold."""
+    before = {(r["name"], r["size"]): r for r in baseline["results"] if not r.get("error")}
+    regressions = []
+    for result in current["results"]:
+        old = before.get((result["name"], result["size"]))
+        if old is None or result.get("error"):
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if old.get(metric) and result.get(metric) is not None:
+                change = result[metric] / old[metric] - 1
+                if change > threshold:
+                    regressions.append((result["name"], result["size"], metric, old[metric], result[metric], change))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the toolkit's data-processing paths.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="run benchmarks and append the results to the history file")
+    run_parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="row counts")
+    run_parser.add_argument("--repeat", type=int, default=3, help="timed repetitions (best is kept)")
+    run_parser.add_argument("--history", default=DEFAULT_HISTORY)
+    run_parser.add_argument("--timeout", type=float, default=DEFAULT_CASE_TIMEOUT, help="seconds per case")
+    compare_parser = sub.add_parser("compare", help="compare the last run with an earlier one")
+    compare_parser.add_argument("--history", default=DEFAULT_HISTORY)
+    compare_parser.add_argument("--baseline", type=int, default=-2, help="index of the baseline run")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    budget_parser = sub.add_parser("import-budget", help="check the cold import time of automation_toolkit")
+    budget_parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="seconds")
+    budget_parser.add_argument("--repeat", type=int, default=5)
+    sub.add_parser("list", help="list the available benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        print("\n".join(sorted(BENCHMARKS)))
+        return 0
+    if args.command == "import-budget":
+        seconds, heavy = min(measure_import() for _ in range(args.repeat))
+        print(f"import automation_toolkit: {seconds * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+        if heavy:
+            print(f"Heavy modules imported eagerly: {', '.join(heavy)}")
+        return 0 if seconds <= args.budget and not heavy else 1
+    if args.command == "run":
+        save_run(args.history, run_benchmarks(args.only, args.sizes, args.repeat, args.timeout))
+        print(f"Results appended to {args.history}")
+        return 0
+
+    history = load_history(args.history)
+    if len(history) < 2:
+        print("Need at least two runs in the history file to compare.")
+        return 1
+    baseline, current = history[args.baseline], history[-1]
+    regressions = compare_runs(baseline, current, args.threshold)
+    print(f"Comparing {current['timestamp']} against {baseline['timestamp']}")
+    for name, size, metric, old, new, change in regressions:
+        print(f"REGRESSION {name} [{size}] {metric}: {old:.3f} -> {new:.3f} (+{change:.0%})")
+    if not regressions:
+        print(f"No regressions above {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
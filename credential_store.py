@@ -0,0 +1,205 @@
+"""
+Script Name: Credential Store Backends
+Description: Pluggable storage backends for ConfigManager. SQLiteBackend keeps one indexed row per
+             account, so lookups stay fast with tens of thousands of accounts. EncryptedBackend stores
+             each password with AES-GCM authenticated encryption and only decrypts the account that is
+             asked for. migrate_ini copies the accounts of an existing pyconfig.ini into a backend.
+
+Usage:
+    python credential_store.py pyconfig.ini credentials.db [--encrypted]
+"""
+
+import os
+import sys
+import base64
+import argparse
+import sqlite3
+import logging
+import threading
+import configparser
+from contextlib import contextmanager
+
+KEY_ENV_VAR = "TOOLKIT_CREDENTIAL_KEY"  # urlsafe base64 of a 32-byte key
+NONCE_BYTES = 12
+
+class _ShiftTable(dict):
+    """str.translate table that shifts every character by a fixed offset, filled in as characters are seen."""
+    def __init__(self, offset):
+        super().__init__()
+        self.offset = offset
+
+    def __missing__(self, code):
+        shifted = self[code] = chr(code + self.offset)
+        return shifted
+
+_SHIFT_UP = _ShiftTable(1)
+_SHIFT_DOWN = _ShiftTable(-1)
+
+def shift_encrypt(password):
+    """Encrypt a password with the toolkit's substitution cipher (each character shifted by one)."""
+    return password.translate(_SHIFT_UP)
+
+def shift_decrypt(encrypted):
+    """Reverse shift_encrypt."""
+    return encrypted.translate(_SHIFT_DOWN)
+
+class ShiftCipher:
+    """The legacy substitution cipher of pyconfig.ini, for backends that must stay compatible with it."""
+    def encrypt(self, account, password):
+        return shift_encrypt(password).encode("utf-8")
+
+    def decrypt(self, account, blob):
+        return shift_decrypt(blob.decode("utf-8"))
+
+def generate_key():
+    """Return a new random key, encoded for the TOOLKIT_CREDENTIAL_KEY environment variable."""
+    return base64.urlsafe_b64encode(os.urandom(32)).decode("ascii")
+
+class AESGCMCipher:
+    """AES-256-GCM authenticated encryption; the account name is bound to its ciphertext."""
+    def __init__(self, key=None):
+        try:
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        except ImportError as e:
+            raise ImportError("EncryptedBackend requires the 'cryptography' package") from e
+        key = key or os.environ.get(KEY_ENV_VAR)
+        if not key:
+            raise ValueError(f"No encryption key given and {KEY_ENV_VAR} is not set")
+        if isinstance(key, str):
+            key = base64.urlsafe_b64decode(key)
+        self._aead = AESGCM(key)
+
+    def encrypt(self, account, password):
+        nonce = os.urandom(NONCE_BYTES)
+        return nonce + self._aead.encrypt(nonce, password.encode("utf-8"), account.encode("utf-8"))
+
+    def decrypt(self, account, blob):
+        # Raises cryptography.exceptions.InvalidTag if the entry was tampered with or moved
+        return self._aead.decrypt(blob[:NONCE_BYTES], blob[NONCE_BYTES:], account.encode("utf-8")).decode("utf-8")
+
+class CredentialBackend:
+    """Interface for ConfigManager storage backends."""
+    def get(self, account):
+        """Return the password for an account, or None if it does not exist."""
+        raise NotImplementedError
+
+    def set(self, account, password):
+        """Add or replace the password for an account."""
+        raise NotImplementedError
+
+    def delete(self, account):
+        """Remove an account; return False if it did not exist."""
+        raise NotImplementedError
+
+    def exists(self, account):
+        raise NotImplementedError
+
+    def accounts(self):
+        """Return all account names."""
+        raise NotImplementedError
+
+    @contextmanager
+    def batch(self):
+        """Group many changes into one write; backends without transactions just run them."""
+        yield self
+
+    def close(self):
+        pass
+
+class SQLiteBackend(CredentialBackend):
+    """Indexed credential store in a single SQLite file (one primary-key row per account)."""
+    def __init__(self, path, cipher=None):
+        self.path = path
+        self.cipher = cipher or ShiftCipher()
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS credentials (account TEXT PRIMARY KEY, secret BLOB NOT NULL)")
+
+    def get(self, account):
+        with self._lock:
+            row = self._conn.execute("SELECT secret FROM credentials WHERE account = ?", (account,)).fetchone()
+        return None if row is None else self.cipher.decrypt(account, row[0])
+
+    def set(self, account, password):
+        secret = self.cipher.encrypt(account, password)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO credentials (account, secret) VALUES (?, ?)", (account, secret))
+
+    def delete(self, account):
+        with self._lock:
+            return self._conn.execute("DELETE FROM credentials WHERE account = ?", (account,)).rowcount > 0
+
+    def exists(self, account):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM credentials WHERE account = ?", (account,)).fetchone() is not None
+
+    def accounts(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT account FROM credentials ORDER BY account")]
+
+    @contextmanager
+    def batch(self):
+        """Run the changes in the with block as one transaction."""
+        with self._lock:
+            if self._batch_depth:
+                self._batch_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._batch_depth -= 1
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth = 1
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._batch_depth = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class EncryptedBackend(SQLiteBackend):
+    """
+    SQLiteBackend with AES-GCM encrypted entries.
+
+    Every password is encrypted on its own, so reading one account decrypts only that entry.
+    The key comes from the key argument or the TOOLKIT_CREDENTIAL_KEY environment variable.
+    """
+    def __init__(self, path, key=None):
+        super().__init__(path, cipher=AESGCMCipher(key))
+
+def migrate_ini(config_file, backend):
+    """Copy every account of an existing pyconfig.ini into a backend; return the number migrated."""
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    with backend.batch():
+        for account in config.sections():
+            backend.set(account, shift_decrypt(config[account]["password"]))
+    logging.info(f"Migrated {len(config.sections())} accounts from {config_file}")
+    return len(config.sections())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate a pyconfig.ini file to a credential store backend.")
+    parser.add_argument("config_file", help="existing INI file")
+    parser.add_argument("store", help="SQLite credential store to create or update")
+    parser.add_argument("--encrypted", action="store_true",
+                        help=f"use AES-GCM encryption with the key in {KEY_ENV_VAR}")
+    args = parser.parse_args(argv)
+    backend = EncryptedBackend(args.store) if args.encrypted else SQLiteBackend(args.store)
+    try:
+        print(f"Migrated {migrate_ini(args.config_file, backend)} accounts to {args.store}")
+    finally:
+        backend.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
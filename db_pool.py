@@ -0,0 +1,233 @@
+"""
+Script Name: Database Connection Pool
+Description: Keeps one pool of reusable connections per server type (SSMS, Oracle, DP3) so that
+             fetch_records does not pay connection setup on every query. Pools have a bounded size,
+             an idle timeout, a health check when a connection is borrowed and a clean shutdown.
+"""
+
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Defaults (override per server type with configure_pool)
+DEFAULT_POOL_SIZE = 5
+DEFAULT_IDLE_TIMEOUT = 300  # seconds a connection may sit unused before it is closed
+DEFAULT_BORROW_TIMEOUT = 30  # seconds to wait for a free connection
+
+def _connect_ssms():
+    """Open a new SQL Server connection through pyodbc."""
+    import pyodbc
+    conn_str = (
+        r"Driver={SQL Server};"
+        r"Server=your_server_name;"
+        r"Database=your_database_name;"
+        r"Trusted_Connection=yes;"
+    )
+    return pyodbc.connect(conn_str)
+
+def _connect_oracle():
+    """Open a new Oracle connection through cx_Oracle."""
+    import cx_Oracle
+    return cx_Oracle.connect("username/password@hostname:port/SID")
+
+_engines = {}
+
+def _connect_dp3():
+    """Open a new DP3 connection from a single, shared SQLAlchemy engine."""
+    if "DP3" not in _engines:
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import NullPool
+        # Pooling happens here, so the engine itself must not hold connections.
+        _engines["DP3"] = create_engine("your_dp3_connection_string", poolclass=NullPool)
+    return _engines["DP3"].connect()
+
+# server_type -> (connect function, health check query)
+SERVERS = {
+    "SSMS": (_connect_ssms, "SELECT 1"),
+    "Oracle": (_connect_oracle, "SELECT 1 FROM DUAL"),
+    "DP3": (_connect_dp3, "SELECT 1"),
+}
+
+def register_server(server_type, connect, ping_query="SELECT 1"):
+    """Register a new server type, e.g. a local SQLite database used as a stand-in."""
+    SERVERS[server_type] = (connect, ping_query)
+    close_pool(server_type)
+
+def _close_quietly(conn):
+    """Close a connection, ignoring errors from connections that are already broken."""
+    try:
+        conn.close()
+    except Exception as e:
+        logging.debug(f"Error while closing connection: {e}")
+
+class ConnectionPool:
+    """Thread-safe pool of reusable database connections for a single server."""
+    def __init__(self, connect, size=DEFAULT_POOL_SIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 ping_query="SELECT 1", pre_ping=True, name="pool"):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.connect = connect
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.ping_query = ping_query
+        self.pre_ping = pre_ping
+        self.name = name
+        self._idle = deque()  # (connection, time it was returned)
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _take_expired(self):
+        """Remove and return idle connections older than the idle timeout (lock must be held)."""
+        expired = []
+        if self.idle_timeout is None:
+            return expired
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < cutoff:
+            expired.append(self._idle.popleft()[0])
+        return expired
+
+    def _is_healthy(self, conn):
+        """Run the health check query on a borrowed connection."""
+        try:
+            if hasattr(conn, "exec_driver_sql"):
+                conn.exec_driver_sql(self.ping_query)
+                conn.rollback()
+            else:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(self.ping_query)
+                    cursor.fetchall()
+                finally:
+                    cursor.close()
+            return True
+        except Exception as e:
+            logging.warning(f"{self.name}: discarding unhealthy connection ({e})")
+            return False
+
+    def acquire(self, timeout=DEFAULT_BORROW_TIMEOUT):
+        """Borrow a connection, opening a new one if the pool is not yet full."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError(f"{self.name} is closed")
+                    expired = self._take_expired()
+                    if self._idle:
+                        conn = self._idle.pop()[0]  # most recently used is the warmest
+                        break
+                    if self._in_use + len(self._idle) < self.size:
+                        conn = None
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"{self.name}: no connection available after {timeout}s")
+                    self._cond.wait(remaining)
+                self._in_use += 1
+            for stale in expired:
+                _close_quietly(stale)
+
+            if conn is not None:
+                if not self.pre_ping or self._is_healthy(conn):
+                    return conn
+                _close_quietly(conn)
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                continue  # try the next idle connection
+
+            try:
+                conn = self.connect()
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            logging.info(f"{self.name}: opened new connection")
+            return conn
+
+    def release(self, conn, discard=False):
+        """Return a borrowed connection to the pool, or close it if discard is set."""
+        with self._cond:
+            self._in_use -= 1
+            keep = not (discard or self._closed)
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if not keep:
+            _close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout=DEFAULT_BORROW_TIMEOUT):
+        """Borrow a connection for the duration of a with block."""
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except BaseException:
+            # Roll back whatever the failed call left open; a connection that cannot roll back is dropped.
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        else:
+            if hasattr(conn, "exec_driver_sql") and conn.in_transaction():
+                conn.rollback()  # SQLAlchemy connections autobegin; end it before reuse
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """Close all idle connections; connections still in use are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn)
+        logging.info(f"{self.name}: closed {len(idle)} idle connection(s)")
+
+# Pool registry, one pool per server type
+_pools = {}
+_pool_settings = {}
+_pools_lock = threading.Lock()
+
+def configure_pool(server_type, **settings):
+    """Set pool options (size, idle_timeout, pre_ping) for a server type."""
+    _pool_settings.setdefault(server_type, {}).update(settings)
+    close_pool(server_type)  # rebuilt with the new settings on next use
+
+def get_pool(server_type):
+    """Return the pool for the given server type, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(server_type)
+        if pool is None:
+            if server_type not in SERVERS:
+                raise ValueError("Unsupported server type")
+            connect, ping_query = SERVERS[server_type]
+            pool = ConnectionPool(connect, ping_query=ping_query, name=f"{server_type} pool",
+                                  **_pool_settings.get(server_type, {}))
+            _pools[server_type] = pool
+        return pool
+
+def close_pool(server_type):
+    """Close and forget the pool for the given server type."""
+    with _pools_lock:
+        pool = _pools.pop(server_type, None)
+    if pool is not None:
+        pool.close()
+
+def close_all_pools():
+    """Close every pool and dispose of shared engines."""
+    for server_type in list(_pools):
+        close_pool(server_type)
+    for engine in _engines.values():
+        engine.dispose()
+    _engines.clear()
+
+atexit.register(close_all_pools)
@@ -0,0 +1,123 @@
+"""
+Script Name: Dependency Manager
+Description: Checks and installs the toolkit's required packages. Presence is checked through package
+             metadata without importing anything, the result is cached against a fingerprint of the
+             interpreter and its site-packages directories so unchanged environments skip the check,
+             and all missing packages are installed with a single pip call (from a local wheelhouse
+             when offline).
+"""
+
+import os
+import sys
+import json
+import socket
+import hashlib
+import logging
+import sysconfig
+import importlib
+import subprocess
+from importlib import metadata
+from importlib.util import find_spec
+
+# Import name -> pip distribution name, where they differ
+DISTRIBUTION_NAMES = {
+    "sklearn": "scikit-learn",
+    "sql_formatter": "sql-formatter",
+    "yaml": "PyYAML",
+}
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".automation_toolkit", "dependencies.json")
+WHEELHOUSE = os.environ.get("TOOLKIT_WHEELHOUSE")  # directory of .whl files for offline installs
+INDEX_HOST = ("pypi.org", 443)
+
+def distribution_name(package):
+    """Return the pip distribution name for an import name."""
+    return DISTRIBUTION_NAMES.get(package, package)
+
+def _site_directories():
+    """Return the directories packages get installed into for this interpreter."""
+    paths = sysconfig.get_paths()
+    directories = {paths["purelib"], paths["platlib"]}
+    try:
+        import site
+        directories.add(site.getusersitepackages())
+    except (ImportError, AttributeError):
+        pass
+    return sorted(d for d in directories if d and os.path.isdir(d))
+
+def environment_fingerprint(packages):
+    """Hash the interpreter, the requested packages and the mtimes of the site-packages directories."""
+    parts = [sys.executable, sys.version, ",".join(sorted(packages))]
+    for directory in _site_directories():
+        parts.append(f"{directory}:{os.stat(directory).st_mtime_ns}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache_file, fingerprint):
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, "w") as f:
+            json.dump({"fingerprint": fingerprint}, f)
+    except OSError as e:
+        logging.warning(f"Could not write dependency cache {cache_file}: {e}")
+
+def is_installed(package):
+    """Check whether a package is installed without importing it."""
+    try:
+        metadata.distribution(distribution_name(package))
+        return True
+    except metadata.PackageNotFoundError:
+        pass
+    # Top-level find_spec only locates the package; it does not execute it.
+    return find_spec(package) is not None
+
+def missing_packages(packages):
+    """Return the packages that are not installed."""
+    return [pkg for pkg in packages if not is_installed(pkg)]
+
+def is_online(timeout=2):
+    """Return True if the package index can be reached."""
+    try:
+        socket.create_connection(INDEX_HOST, timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+def install(packages, wheelhouse=WHEELHOUSE, offline=None):
+    """Install packages with a single pip invocation, from the wheelhouse when offline."""
+    command = [sys.executable, "-m", "pip", "install"]
+    if offline is None:
+        offline = bool(wheelhouse) and not is_online()
+    if offline:
+        if not wheelhouse:
+            raise RuntimeError("Offline install requested but no wheelhouse is configured")
+        command += ["--no-index", "--find-links", wheelhouse]
+    command += [distribution_name(pkg) for pkg in packages]
+    logging.info(f"Installing missing packages{' from ' + wheelhouse if offline else ''}: {', '.join(packages)}")
+    subprocess.check_call(command)
+    importlib.invalidate_caches()
+
+def ensure_packages(packages, wheelhouse=WHEELHOUSE, offline=None, cache_file=CACHE_FILE):
+    """
+    Make sure all packages are installed and return the ones that had to be installed.
+
+    If the environment fingerprint matches the last successful check, nothing is checked at all.
+    """
+    fingerprint = environment_fingerprint(packages)
+    if cache_file and _load_cache(cache_file).get("fingerprint") == fingerprint:
+        logging.info("Environment unchanged since last check; skipping dependency check.")
+        return []
+    missing = missing_packages(packages)
+    if missing:
+        install(missing, wheelhouse=wheelhouse, offline=offline)
+        fingerprint = environment_fingerprint(packages)  # installing changed site-packages
+    else:
+        logging.info("All required packages are already installed.")
+    if cache_file:
+        _save_cache(cache_file, fingerprint)
+    return missing
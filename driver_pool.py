@@ -0,0 +1,197 @@
+"""
+Script Name: Browser Session Pool
+Description: Keeps N warm Selenium sessions (WebDriverManager instances) and hands them to a pool of
+             worker threads, so scraping runs do not pay the browser launch cost per page. Sessions are
+             recycled after a number of pages or when the browser crashes, and per-session throughput is
+             reported. serve_directory starts a local static HTTP server for trying the pool out.
+"""
+
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MAX_PAGES = 200  # pages a session serves before it is restarted
+DEFAULT_BORROW_TIMEOUT = 300
+
+class _Session:
+    """A pooled browser session and its counters."""
+    def __init__(self, session_id, manager):
+        self.session_id = session_id
+        self.manager = manager
+        self.pages = 0  # since the last (re)start
+        self.total_pages = 0
+        self.busy_seconds = 0.0
+        self.errors = 0
+        self.restarts = 0
+
+class WebDriverPool:
+    """
+    Pool of warm browser sessions.
+
+    Extra keyword arguments are passed to WebDriverManager (browser, headless, driver_path, ...).
+    A custom factory returning a started WebDriverManager-like object can be given instead.
+    """
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, factory=None, **manager_kwargs):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        manager_kwargs.setdefault("browser", "chrome")
+        manager_kwargs.setdefault("headless", True)
+        self.size = size
+        self.max_pages = max_pages
+        self.factory = factory or partial(self._start_manager, manager_kwargs)
+        self._sessions = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def _start_manager(manager_kwargs):
+        from automation_toolkit import WebDriverManager
+        manager = WebDriverManager(**manager_kwargs)
+        manager.init_driver()
+        return manager
+
+    def start(self):
+        """Launch all sessions up front (in parallel) so the first pages do not wait for a browser."""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            managers = list(executor.map(lambda _: self.factory(), range(self.size - len(self._sessions))))
+        with self._lock:
+            for manager in managers:
+                session = _Session(len(self._sessions) + 1, manager)
+                self._sessions.append(session)
+                self._idle.put(session)
+        logging.info(f"Started {len(managers)} browser session(s)")
+        return self
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if not self._sessions:
+                self.start()
+
+    def _restart(self, session, reason):
+        """Quit a session's browser and launch a fresh one in its place."""
+        logging.info(f"Recycling browser session {session.session_id} ({reason})")
+        try:
+            session.manager.close_driver()
+        except Exception as e:
+            logging.debug(f"Error while closing session {session.session_id}: {e}")
+        session.manager = self.factory()
+        session.pages = 0
+        session.restarts += 1
+
+    @staticmethod
+    def _is_alive(manager):
+        try:
+            manager.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def session(self, timeout=DEFAULT_BORROW_TIMEOUT):
+        """Borrow a session's WebDriverManager for the duration of a with block."""
+        if self._closed:
+            raise RuntimeError("WebDriverPool is closed")
+        self._ensure_started()
+        try:
+            session = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No browser session available after {timeout}s")
+        start = time.perf_counter()
+        crashed = False
+        try:
+            yield session.manager
+            session.pages += 1
+            session.total_pages += 1
+        except Exception:
+            session.errors += 1
+            crashed = not self._is_alive(session.manager)
+            raise
+        finally:
+            session.busy_seconds += time.perf_counter() - start
+            try:
+                if self._closed:
+                    session.manager.close_driver()
+                elif crashed:
+                    self._restart(session, "browser crashed")
+                elif session.pages >= self.max_pages:
+                    self._restart(session, f"{session.pages} pages")
+            except Exception as e:
+                logging.error(f"Could not restart browser session {session.session_id}: {e}")
+            finally:
+                self._idle.put(session)
+
+    def map(self, func, urls):
+        """
+        Open every URL in a pooled session and return [(url, func(manager), error)] in input order.
+
+        Pages are processed by one worker thread per session; an error on one page is recorded
+        in its entry and does not stop the others.
+        """
+        def visit(url):
+            try:
+                with self.session() as manager:
+                    manager.open_url(url)
+                    return url, func(manager), None
+            except Exception as e:
+                logging.error(f"Failed on {url}: {e}")
+                return url, None, e
+
+        self._ensure_started()
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="browser") as executor:
+            return list(executor.map(visit, urls))
+
+    def stats(self):
+        """Return per-session page counts, busy time, throughput, errors and restarts."""
+        return [{
+            "session": session.session_id,
+            "pages": session.total_pages,
+            "busy_seconds": session.busy_seconds,
+            "pages_per_sec": session.total_pages / session.busy_seconds if session.busy_seconds else 0.0,
+            "errors": session.errors,
+            "restarts": session.restarts,
+        } for session in self._sessions]
+
+    def close(self):
+        """Quit every idle browser; sessions still in use quit when they are returned."""
+        self._closed = True
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                session.manager.close_driver()
+            except Exception as e:
+                logging.debug(f"Error while closing session {session.session_id}: {e}")
+        logging.info("Browser pool closed.")
+
+    def __enter__(self):
+        self._ensure_started()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+@contextmanager
+def serve_directory(directory, port=0):
+    """Serve a directory over HTTP on localhost in a background thread; yields the base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(_QuietHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
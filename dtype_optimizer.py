@@ -0,0 +1,193 @@
+"""
+Script Name: DataFrame dtype Optimizer
+Description: Shrinks fetched DataFrames by picking compact dtypes: integers are downcast to the smallest type
+             that holds their range, floats optionally to float32, low-cardinality strings become categoricals
+             and, optionally, other strings become Arrow-backed strings. String statistics come from a random
+             sample, and the chosen dtypes are kept in a schema cache per query (or workbook), so later runs
+             skip the inference and only re-check integer ranges.
+"""
+
+import os
+import json
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SAMPLE_ROWS = 100000
+DEFAULT_CATEGORY_RATIO = 0.5  # strings become categoricals when distinct values <= ratio * sampled values
+DEFAULT_SCHEMA_CACHE = os.path.join(os.path.expanduser("~"), ".automation_toolkit", "schemas.json")
+INTEGER_TYPES = ("int8", "int16", "int32", "int64")
+
+def _is_string_column(series):
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+def _integer_dtype(series):
+    """Return the smallest signed integer dtype that holds the column's values (nullable if it was)."""
+    if series.notna().sum() == 0:
+        return None
+    low, high = series.min(), series.max()
+    for name in INTEGER_TYPES:
+        info = np.iinfo(name)
+        if info.min <= low and high <= info.max:
+            return name.capitalize() if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) else name
+    return None
+
+def _string_dtype(series, sample_rows, category_ratio, arrow_strings, random_state):
+    """Pick category, an Arrow string dtype or nothing for a string column, from a sample of its values."""
+    values = series.dropna()
+    if values.empty:
+        return None
+    if len(values) > sample_rows:
+        values = values.sample(sample_rows, random_state=random_state)
+    if values.dtype == object and not values.map(type).eq(str).all():
+        return None  # mixed types (e.g. Decimal or dates) are left alone
+    if values.nunique() <= category_ratio * len(values):
+        return "category"
+    if arrow_strings and not (isinstance(series.dtype, pd.StringDtype) and series.dtype.storage == "pyarrow"):
+        return "string[pyarrow]"
+    return None
+
+def infer_schema(df, sample_rows=DEFAULT_SAMPLE_ROWS, category_ratio=DEFAULT_CATEGORY_RATIO,
+                 arrow_strings=False, float32=False, random_state=0):
+    """
+    Return {column: dtype} for the columns of df that can be stored more compactly.
+
+    Integer ranges are taken from the whole column (a sampled range could overflow on downcast);
+    string cardinality is estimated from a random sample of sample_rows values. float32 is opt-in
+    because it keeps only about 7 significant digits.
+    """
+    schema = {}
+    for column in df.columns:
+        series = df[column]
+        target = None
+        if pd.api.types.is_integer_dtype(series.dtype):
+            target = _integer_dtype(series)
+        elif pd.api.types.is_float_dtype(series.dtype):
+            target = "float32" if float32 and series.dtype == np.float64 else None
+        elif _is_string_column(series):
+            target = _string_dtype(series, sample_rows, category_ratio, arrow_strings, random_state)
+        if target is not None and target != str(series.dtype):
+            schema[str(column)] = target
+    return schema
+
+def _fits(series, dtype):
+    """Check that a cached dtype is still safe for this data (integer ranges may have grown)."""
+    if dtype.lower() in INTEGER_TYPES:
+        if not pd.api.types.is_integer_dtype(series.dtype) or (dtype.islower() and series.hasnans):
+            return False
+        needed = _integer_dtype(series)
+        return needed is not None and INTEGER_TYPES.index(needed.lower()) <= INTEGER_TYPES.index(dtype.lower())
+    if dtype in ("category", "string[pyarrow]"):
+        return _is_string_column(series) or isinstance(series.dtype, pd.CategoricalDtype)
+    return True
+
+def apply_schema(df, schema):
+    """Convert the columns of df named in schema; returns the new frame and the columns that did not fit."""
+    conversions, stale = {}, []
+    for column in df.columns:
+        dtype = schema.get(str(column))
+        if dtype is None or str(df[column].dtype) == dtype:
+            continue
+        if _fits(df[column], dtype):
+            conversions[column] = dtype
+        else:
+            stale.append(column)
+    return (df.astype(conversions) if conversions else df), stale
+
+class SchemaCache:
+    """JSON file of inferred schemas, keyed by query (see query_cache.cache_key) or workbook sheet."""
+    def __init__(self, path=DEFAULT_SCHEMA_CACHE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._schemas = None
+
+    def _load(self):
+        if self._schemas is None:
+            try:
+                with open(self.path) as f:
+                    self._schemas = json.load(f)
+            except (OSError, ValueError):
+                self._schemas = {}
+        return self._schemas
+
+    def get(self, key):
+        with self._lock:
+            return self._load().get(key)
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self._schemas, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write schema cache {self.path}: {e}")
+
+    def put(self, key, schema):
+        with self._lock:
+            self._load()[key] = schema
+            self._save()
+
+    def invalidate(self, key=None):
+        """Forget one schema, or all of them."""
+        with self._lock:
+            schemas = self._load()
+            if key is None:
+                schemas.clear()
+            else:
+                schemas.pop(key, None)
+            self._save()
+
+_default_cache = None
+
+def default_schema_cache():
+    """Return the process-wide SchemaCache at DEFAULT_SCHEMA_CACHE."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SchemaCache()
+    return _default_cache
+
+def memory_report(before, after):
+    """Return a per-column DataFrame of dtype and deep memory use before and after shrinking."""
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "bytes_before": before.memory_usage(index=False, deep=True),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_after": after.memory_usage(index=False, deep=True),
+    })
+    report["saved_pct"] = (1 - report["bytes_after"] / report["bytes_before"].where(report["bytes_before"] > 0)) * 100
+    return report
+
+def shrink(df, key=None, cache=None, report=True, **options):
+    """
+    Return df with compact dtypes.
+
+    With a key, the schema is looked up in cache (the default SchemaCache if None) and only
+    inferred, then stored, when missing or when cached integer ranges no longer fit. options are
+    passed to infer_schema. With report, memory before and after is logged.
+    """
+    if df.empty:
+        return df
+    cache = cache if cache is not None or key is None else default_schema_cache()
+    schema = cache.get(key) if key is not None else None
+    if schema is None:
+        schema = infer_schema(df, **options)
+        if key is not None:
+            cache.put(key, schema)
+        result, _ = apply_schema(df, schema)
+    else:
+        result, stale = apply_schema(df, schema)
+        if stale:
+            fresh = infer_schema(df[stale], **options)
+            result, _ = apply_schema(result, fresh)
+            schema = {**{col: dtype for col, dtype in schema.items() if col not in map(str, stale)}, **fresh}
+            cache.put(key, schema)
+    if report:
+        before = int(df.memory_usage(index=True, deep=True).sum())
+        after = int(result.memory_usage(index=True, deep=True).sum())
+        logging.info(f"Shrunk {len(df.columns)} columns from {before / 1024 ** 2:.1f} MB to "
+                     f"{after / 1024 ** 2:.1f} MB ({(1 - after / before) * 100 if before else 0:.0f}% less)")
+    return result
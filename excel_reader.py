@@ -0,0 +1,155 @@
+"""
+Script Name: Chunked Excel Reader
+Description: Streams rows from large .xlsb (pyxlsb) and .xlsx (openpyxl read-only) workbooks in DataFrame
+             chunks, with column projection and dtype hints. An optional conversion cache writes a Feather
+             sidecar on the first read; later reads memory-map the sidecar instead of parsing the workbook.
+"""
+
+import os
+import logging
+
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 50000
+
+def _iter_xlsb_rows(path, sheet_name):
+    """Yield the rows of an .xlsb sheet as lists of values."""
+    from pyxlsb import open_workbook
+    with open_workbook(path) as workbook:
+        # pyxlsb numbers sheets from 1
+        sheet_id = sheet_name + 1 if isinstance(sheet_name, int) else sheet_name
+        with workbook.get_sheet(sheet_id) as sheet:
+            for row in sheet.rows(sparse=True):
+                values = [None] * (max(cell.c for cell in row) + 1) if row else []
+                for cell in row:
+                    values[cell.c] = cell.v
+                yield values
+
+def _iter_xlsx_rows(path, sheet_name):
+    """Yield the rows of an .xlsx sheet as lists of values."""
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        for row in sheet.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+def _iter_workbook_chunks(path, sheet_name, chunksize):
+    """Parse a workbook sheet and yield DataFrames of at most chunksize rows (first row is the header)."""
+    reader = _iter_xlsb_rows if path.lower().endswith(".xlsb") else _iter_xlsx_rows
+    rows = reader(path, sheet_name)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [str(col) if col is not None else f"Unnamed: {idx}" for idx, col in enumerate(header)]
+    width = len(columns)
+    block = []
+    for values in rows:
+        if len(values) < width:
+            values = values + [None] * (width - len(values))
+        block.append(values[:width])
+        if len(block) >= chunksize:
+            yield pd.DataFrame(block, columns=columns)
+            block = []
+    if block:
+        yield pd.DataFrame(block, columns=columns)
+
+def sidecar_path(path, sheet_name, cache_dir=None):
+    """Return the path of the Feather sidecar for a workbook sheet."""
+    directory = cache_dir or os.path.dirname(os.path.abspath(path))
+    return os.path.join(directory, f"{os.path.basename(path)}.{sheet_name}.feather")
+
+def _sidecar_is_fresh(path, sidecar):
+    return os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(path)
+
+def _iter_sidecar(sidecar, chunksize, usecols):
+    """Yield chunks from a memory-mapped Feather sidecar."""
+    from pyarrow import feather
+    table = feather.read_table(sidecar, columns=usecols, memory_map=True)
+    for batch in table.to_batches(max_chunksize=chunksize):
+        yield batch.to_pandas()
+
+def _write_through_sidecar(chunks, sidecar):
+    """Yield chunks unchanged while writing them to a Feather sidecar; abandon it on a schema clash."""
+    import pyarrow as pa
+    tmp_path = sidecar + ".tmp"
+    writer, schema = None, None
+    try:
+        for chunk in chunks:
+            if writer is not None or schema is None:
+                try:
+                    table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                    if writer is None:
+                        schema = table.schema
+                        writer = pa.ipc.new_file(tmp_path, schema)
+                    writer.write_table(table)
+                except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError) as e:
+                    logging.warning(f"Not caching {sidecar}: column types change between chunks ({e})")
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                    schema = False  # stop trying for the rest of the sheet
+            yield chunk
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(tmp_path, sidecar)
+            logging.info(f"Wrote conversion cache {sidecar}")
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _schema_key(path, sheet_name, usecols):
+    """Return the dtype_optimizer schema cache key of a workbook sheet and column selection."""
+    return f"excel:{os.path.abspath(path)}:{sheet_name}:{','.join(map(str, usecols or []))}"
+
+def read_excel_chunks(path, sheet_name=0, chunksize=DEFAULT_CHUNK_ROWS, usecols=None, dtype=None,
+                      cache=False, cache_dir=None, optimize=False):
+    """
+    Yield a workbook sheet as DataFrames of at most chunksize rows.
+
+    usecols limits the columns returned and dtype is a {column: dtype} mapping applied to each
+    chunk. With cache=True the first full read also writes a Feather sidecar (next to the workbook,
+    or in cache_dir); later reads memory-map the sidecar while it is newer than the workbook.
+    With optimize=True (or a dict of dtype_optimizer.infer_schema options) chunks are shrunk to
+    compact dtypes, with the schema cached per workbook sheet and column selection.
+    """
+    if optimize:
+        from dtype_optimizer import shrink
+        options = optimize if isinstance(optimize, dict) else {}
+        key = _schema_key(path, sheet_name, usecols)
+    sidecar = sidecar_path(path, sheet_name, cache_dir)
+    if cache and _sidecar_is_fresh(path, sidecar):
+        chunks = _iter_sidecar(sidecar, chunksize, usecols)
+    else:
+        chunks = _iter_workbook_chunks(path, sheet_name, chunksize)
+        if cache:
+            chunks = _write_through_sidecar(chunks, sidecar)
+    for chunk in chunks:
+        if usecols is not None:
+            chunk = chunk[list(usecols)]
+        if dtype:
+            chunk = chunk.astype({col: kind for col, kind in dtype.items() if col in chunk.columns})
+        if optimize:
+            chunk = shrink(chunk, key=key, **options)
+        yield chunk
+
+def read_excel_fast(path, sheet_name=0, usecols=None, dtype=None, cache=True, cache_dir=None, optimize=False):
+    """
+    Read a whole workbook sheet into one DataFrame through read_excel_chunks.
+
+    optimize shrinks the whole frame at once, so categoricals share one set of categories.
+    """
+    chunks = list(read_excel_chunks(path, sheet_name, usecols=usecols, dtype=dtype,
+                                    cache=cache, cache_dir=cache_dir))
+    if not chunks:
+        return pd.DataFrame(columns=list(usecols) if usecols else [])
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    if optimize:
+        from dtype_optimizer import shrink
+        df = shrink(df, key=_schema_key(path, sheet_name, usecols), **(optimize if isinstance(optimize, dict) else {}))
+    return df
@@ -0,0 +1,197 @@
+"""
+Script Name: Streaming Excel Writer
+Description: High-throughput export path for create_excel. Rows are streamed to disk with XlsxWriter in
+             constant-memory mode when it is installed, or openpyxl write-only mode otherwise, so memory
+             stays bounded whatever the number of rows. Frames longer than Excel's row limit are split
+             across numbered sheets. export_workbooks writes independent workbooks in a process pool.
+"""
+
+import os
+import time
+import shutil
+import logging
+import tempfile
+from importlib.util import find_spec
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+EXCEL_MAX_ROWS = 1048576  # rows per worksheet, including the header
+EXCEL_MAX_SHEET_NAME = 31
+ROW_BLOCK = 50000  # rows converted to Python values at a time
+
+class _XlsxWriterBook:
+    """XlsxWriter workbook in constant-memory mode (rows are flushed as they are written)."""
+    def __init__(self, path):
+        import xlsxwriter
+        self.workbook = xlsxwriter.Workbook(path, {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+            "remove_timezone": True,
+        })
+        self.sheet = None
+        self.row = 0
+
+    def add_sheet(self, name):
+        self.sheet = self.workbook.add_worksheet(name)
+        self.row = 0
+
+    def append(self, values):
+        self.sheet.write_row(self.row, 0, values)
+        self.row += 1
+
+    def close(self):
+        self.workbook.close()
+
+class _OpenpyxlBook:
+    """openpyxl workbook in write-only mode."""
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+
+    def add_sheet(self, name):
+        self.sheet = self.workbook.create_sheet(name)
+
+    def append(self, values):
+        self.sheet.append(values)
+
+    def close(self):
+        self.workbook.save(self.path)
+        self.workbook.close()
+
+ENGINES = {"xlsxwriter": _XlsxWriterBook, "openpyxl": _OpenpyxlBook}
+
+def default_engine():
+    """Return the fastest streaming engine that is installed."""
+    return "xlsxwriter" if find_spec("xlsxwriter") else "openpyxl"
+
+def _iter_chunks(data):
+    """Yield DataFrame chunks from a DataFrame or an iterable of DataFrames."""
+    if isinstance(data, pd.DataFrame):
+        yield data
+    else:
+        yield from data
+
+def _iter_rows(df):
+    """Yield the rows of a DataFrame as tuples of plain Python values, with missing values as None."""
+    for start in range(0, len(df), ROW_BLOCK):
+        block = df.iloc[start:start + ROW_BLOCK].astype(object)
+        yield from block.where(block.notna(), None).itertuples(index=False, name=None)
+
+def _sheet_name(base, part):
+    """Return the worksheet name for a part of a split sheet, within Excel's 31-character limit."""
+    if part == 1:
+        return base[:EXCEL_MAX_SHEET_NAME]
+    suffix = f"_{part}"
+    return base[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+
+def write_excel_fast(dataframes, path, sheet_names=None, engine=None, time_budget=None):
+    """
+    Stream a list of DataFrames (or iterables of DataFrame chunks) to an Excel file.
+
+    Each item becomes one sheet, named from sheet_names or Sheet1, Sheet2, ...; a sheet that
+    passes Excel's row limit continues on "<name>_2", "<name>_3" and so on. Logs a warning if
+    time_budget (seconds) is exceeded and returns rows, seconds and rows_per_sec.
+    """
+    engine = engine or default_engine()
+    book = ENGINES[engine](path)
+    start = time.perf_counter()
+    total_rows = 0
+    try:
+        for idx, data in enumerate(dataframes):
+            base = sheet_names[idx] if sheet_names else f"Sheet{idx + 1}"
+            part, sheet_rows, header = 0, EXCEL_MAX_ROWS, None
+            for chunk in _iter_chunks(data):
+                if header is None:
+                    header = [str(col) for col in chunk.columns]
+                for values in _iter_rows(chunk):
+                    if sheet_rows >= EXCEL_MAX_ROWS:
+                        part += 1
+                        book.add_sheet(_sheet_name(base, part))
+                        book.append(header)
+                        sheet_rows = 1
+                    book.append(values)
+                    sheet_rows += 1
+                    total_rows += 1
+            if part == 0:  # no rows at all: still write the sheet with its header
+                book.add_sheet(_sheet_name(base, 1))
+                book.append(header or [])
+    finally:
+        book.close()
+    seconds = time.perf_counter() - start
+    rows_per_sec = total_rows / seconds if seconds else float("inf")
+    logging.info(f"Excel file created at {path} ({total_rows} rows in {seconds:.1f}s with {engine})")
+    if time_budget is not None and seconds > time_budget:
+        logging.warning(f"Excel export to {path} took {seconds:.1f}s, over the {time_budget}s budget")
+    return {"rows": total_rows, "seconds": seconds, "rows_per_sec": rows_per_sec}
+
+def _stage_sheet(data, staging_dir, prefix):
+    """Write the chunks of one sheet to Feather files and return their paths."""
+    from query_cache import write_feather
+    paths = []
+    for idx, chunk in enumerate(_iter_chunks(data)):
+        path = os.path.join(staging_dir, f"{prefix}_{idx}.feather")
+        write_feather(chunk, path)
+        paths.append(path)
+    return paths
+
+def _read_staged(paths):
+    """Yield the staged chunks of one sheet through memory maps."""
+    from query_cache import read_feather
+    for path in paths:
+        yield read_feather(path)
+
+def _export_worker(path, sheets, staged, sheet_names, engine):
+    """Write one workbook in a worker process and return its manifest entry."""
+    start = time.perf_counter()
+    try:
+        if staged:
+            sheets = [_read_staged(paths) for paths in sheets]
+        stats = write_excel_fast(sheets, path, sheet_names=sheet_names, engine=engine)
+        return {"path": path, "rows": stats["rows"], "seconds": time.perf_counter() - start,
+                "bytes": os.path.getsize(path), "error": None}
+    except Exception as e:
+        return {"path": path, "rows": 0, "seconds": time.perf_counter() - start, "bytes": 0,
+                "error": f"{type(e).__name__}: {e}"}
+
+def export_workbooks(jobs, max_workers=None, engine=None, staging_dir=None):
+    """
+    Write many independent workbooks in parallel and return a manifest with one entry per job.
+
+    jobs is a list of (dataframes, path) or (dataframes, path, sheet_names) tuples, where
+    dataframes is what write_excel_fast accepts. When pyarrow is installed, frames are handed
+    to the workers as Feather files in staging_dir (a temporary directory by default) and read
+    back through memory maps instead of being pickled. Callers on Windows must run this under
+    an `if __name__ == "__main__":` guard.
+    """
+    staged = find_spec("pyarrow") is not None
+    own_staging = staged and staging_dir is None
+    if own_staging:
+        staging_dir = tempfile.mkdtemp(prefix="excel_export_")
+    elif staged:
+        os.makedirs(staging_dir, exist_ok=True)
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for job_idx, job in enumerate(jobs):
+                dataframes, path = job[0], job[1]
+                sheet_names = job[2] if len(job) > 2 else None
+                if staged:
+                    sheets = [_stage_sheet(data, staging_dir, f"{job_idx}_{sheet_idx}")
+                              for sheet_idx, data in enumerate(dataframes)]
+                else:
+                    sheets = [list(_iter_chunks(data)) for data in dataframes]
+                futures.append(executor.submit(_export_worker, path, sheets, staged, sheet_names, engine))
+            manifest = [future.result() for future in futures]
+    finally:
+        if own_staging:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    failed = [entry for entry in manifest if entry["error"]]
+    for entry in failed:
+        logging.error(f"Export of {entry['path']} failed: {entry['error']}")
+    logging.info(f"Exported {len(manifest) - len(failed)} of {len(manifest)} workbooks "
+                 f"in {time.perf_counter() - start:.1f}s")
+    return manifest
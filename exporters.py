@@ -0,0 +1,314 @@
+"""
+Script Name: Columnar Exporters
+Description: Export path for machine consumers, alongside create_excel (which stays for reports people open).
+             The same list of DataFrames (or iterables of DataFrame chunks) is written to Parquet, Feather
+             (Arrow IPC) or compressed CSV with a configurable codec and row-group size. Chunks are appended
+             one at a time, so streaming sources such as fetch_records(chunksize=...) are never held in
+             memory whole, and read_export/iter_export read the files back through a memory map.
+"""
+
+import os
+import bz2
+import gzip
+import time
+import logging
+
+import pandas as pd
+
+from instrumentation import instrument
+
+FORMATS = ("parquet", "feather", "csv")
+DEFAULT_CODECS = {"parquet": "zstd", "feather": "zstd", "csv": "gzip"}
+CODECS = {
+    "parquet": ("zstd", "snappy", "gzip", "brotli", "lz4", "none"),
+    "feather": ("zstd", "lz4", "none"),
+    "csv": ("gzip", "bz2", "zstd", "lz4", "none"),
+}
+DEFAULT_ROW_GROUP_ROWS = 262144  # rows per Parquet row group / Feather record batch
+DEFAULT_GZIP_LEVEL = 6  # about twice as fast as level 9 for a file ~2% larger
+EXTENSIONS = {".parquet": "parquet", ".pq": "parquet", ".feather": "feather", ".arrow": "feather",
+              ".ipc": "feather", ".csv": "csv"}
+CSV_SUFFIXES = {"gzip": ".gz", "bz2": ".bz2", "zstd": ".zst", "lz4": ".lz4", "none": ""}
+
+def _csv_codec(path):
+    """Return the compression implied by a CSV file name (data.csv.gz -> gzip), or None."""
+    name = path.lower()
+    for codec, suffix in CSV_SUFFIXES.items():
+        if suffix and name.endswith(".csv" + suffix):
+            return codec
+    return "none" if name.endswith(".csv") else None
+
+def format_from_path(path):
+    """Return the export format for a file name, e.g. "parquet" for orders.parquet."""
+    if _csv_codec(path) is not None:
+        return "csv"
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the export format of {path}; pass fmt")
+    return fmt
+
+def export_file_name(name, fmt, codec=None):
+    """Return the file name export uses for one sheet, e.g. Sheet1.parquet or Sheet1.csv.gz."""
+    codec = codec or DEFAULT_CODECS[fmt]
+    return f"{name}.{fmt}" + (CSV_SUFFIXES[codec] if fmt == "csv" else "")
+
+def _resolve_codec(fmt, codec, path):
+    if codec is None:
+        codec = (_csv_codec(path) if fmt == "csv" else None) or DEFAULT_CODECS[fmt]
+    codec = codec.lower()
+    if codec not in CODECS[fmt]:
+        raise ValueError(f"Codec '{codec}' is not supported for {fmt}; use one of {', '.join(CODECS[fmt])}")
+    return codec
+
+def _decode_dictionaries(table):
+    """Replace dictionary (categorical) columns by their values."""
+    import pyarrow as pa
+    for idx, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(idx, field.name, table.column(idx).cast(field.type.value_type))
+    return table
+
+class _ParquetFile:
+    """Parquet writer that buffers chunks into row groups of row_group_size rows."""
+    def __init__(self, path, schema, codec, row_group_size, level):
+        import pyarrow.parquet as pq
+        self.writer = pq.ParquetWriter(path, schema, compression=codec or "none", compression_level=level)
+        self.row_group_size = row_group_size
+        self.pending = []
+        self.pending_rows = 0
+
+    def write(self, table):
+        self.pending.append(table)
+        self.pending_rows += table.num_rows
+        if self.pending_rows >= self.row_group_size:
+            self._flush(final=False)
+
+    def _flush(self, final):
+        import pyarrow as pa
+        table = pa.concat_tables(self.pending)
+        full = table.num_rows if final else table.num_rows - table.num_rows % self.row_group_size
+        if full:
+            self.writer.write_table(table.slice(0, full), row_group_size=self.row_group_size)
+        self.pending = [table.slice(full)] if full < table.num_rows else []
+        self.pending_rows = table.num_rows - full
+
+    def close(self):
+        if self.pending:
+            self._flush(final=True)
+        self.writer.close()
+
+class _FeatherFile:
+    """Arrow IPC file writer; record batches hold at most row_group_size rows."""
+    def __init__(self, path, schema, codec, row_group_size, level):
+        import pyarrow as pa
+        if codec is not None and level is not None:
+            codec = pa.Codec(codec, compression_level=level)
+        options = pa.ipc.IpcWriteOptions(compression=codec)
+        self.writer = pa.ipc.new_file(path, schema, options=options)
+        self.row_group_size = row_group_size
+
+    def write(self, table):
+        self.writer.write_table(table, max_chunksize=self.row_group_size)
+
+    def close(self):
+        self.writer.close()
+
+class _CsvFile:
+    """CSV writer on top of a (compressed) output stream; the level only applies to gzip and bz2."""
+    def __init__(self, path, schema, codec, row_group_size, level):
+        import pyarrow as pa
+        from pyarrow import csv
+        if codec == "gzip":
+            self.stream = gzip.open(path, "wb", compresslevel=level or DEFAULT_GZIP_LEVEL)
+        elif codec == "bz2":
+            self.stream = bz2.open(path, "wb", compresslevel=level or 9)
+        elif codec is None:
+            self.stream = pa.OSFile(path, "wb")
+        else:
+            self.stream = pa.CompressedOutputStream(path, codec)
+        self.writer = csv.CSVWriter(self.stream, schema)
+
+    def write(self, table):
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+        self.stream.close()
+
+WRITERS = {"parquet": _ParquetFile, "feather": _FeatherFile, "csv": _CsvFile}
+
+class ExportWriter:
+    """
+    Append DataFrame chunks to one Parquet, Feather or CSV file.
+
+    The schema comes from the first chunk and later chunks are cast to it, so a column that is
+    entirely null in the first chunk should be given its dtype up front. Feather and CSV files
+    store categoricals as plain values (an IPC file cannot change a dictionary between batches).
+    The file is written under a temporary name and moved into place on close, so readers never
+    see a partial export.
+    """
+    def __init__(self, path, fmt=None, codec=None, row_group_size=DEFAULT_ROW_GROUP_ROWS, compression_level=None):
+        self.path = path
+        self.fmt = fmt or format_from_path(path)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"fmt must be one of {', '.join(FORMATS)}")
+        self.codec = _resolve_codec(self.fmt, codec, path)
+        self.row_group_size = row_group_size
+        self.compression_level = compression_level
+        self.rows = 0
+        self._file = None
+        self._schema = None
+        self._temp_path = f"{path}.{os.getpid()}.tmp"
+        self._start = time.perf_counter()
+
+    def _to_table(self, df):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.fmt != "parquet":
+            table = _decode_dictionaries(table)
+        if self._schema is None:
+            return table
+        try:
+            return table.select(self._schema.names).cast(self._schema)
+        except (KeyError, pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ValueError(f"Chunk does not match the schema of {self.path}: {e}") from e
+
+    def write(self, df):
+        """Append a DataFrame to the file."""
+        table = self._to_table(df)
+        if self._file is None:
+            self._schema = table.schema
+            codec = None if self.codec == "none" else self.codec
+            self._file = WRITERS[self.fmt](self._temp_path, table.schema, codec, self.row_group_size,
+                                           self.compression_level)
+        self._file.write(table)
+        self.rows += table.num_rows
+        return self
+
+    def close(self):
+        """Finish the file and return its manifest entry: path, format, codec, rows, bytes and seconds."""
+        if self._file is None:
+            self.write(pd.DataFrame())
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+        seconds = time.perf_counter() - self._start
+        return {"path": self.path, "format": self.fmt, "codec": self.codec, "rows": self.rows,
+                "bytes": os.path.getsize(self.path), "seconds": seconds}
+
+    def abort(self):
+        """Discard the partial file."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def _iter_frames(data):
+    if isinstance(data, pd.DataFrame):
+        yield data
+    else:
+        yield from data
+
+def _manifest_measure(result, *args, **kwargs):
+    """Rows and bytes written across the files of an export, for instrumentation."""
+    return sum(entry["rows"] for entry in result), sum(entry["bytes"] for entry in result)
+
+@instrument("export", measure=_manifest_measure)
+def export(dataframes, path, fmt=None, sheet_names=None, codec=None, row_group_size=DEFAULT_ROW_GROUP_ROWS,
+           compression_level=None):
+    """
+    Write a list of DataFrames (or iterables of DataFrame chunks) to Parquet, Feather or CSV files.
+
+    Takes the same input as create_excel. With one item, path is the output file and fmt
+    defaults to its extension; with several, path is a directory holding one file per item,
+    named from sheet_names (or Sheet1, Sheet2, ...) and fmt defaults to "parquet". codec is
+    one of CODECS[fmt]; CSV takes it from the file name (.csv.gz, .csv.zst, ...) when not given.
+    compression_level is passed to the codec (None keeps its default).
+    Returns the manifest: one dict per file with path, format, codec, rows, bytes and seconds.
+    """
+    dataframes = list(dataframes)
+    if len(dataframes) == 1 and not os.path.isdir(path):
+        targets = [(path, fmt or format_from_path(path))]
+    else:
+        fmt = fmt or "parquet"
+        os.makedirs(path, exist_ok=True)
+        names = sheet_names or [f"Sheet{idx + 1}" for idx in range(len(dataframes))]
+        targets = [(os.path.join(path, export_file_name(name, fmt, codec)), fmt) for name in names]
+    manifest = []
+    for (target, target_fmt), data in zip(targets, dataframes):
+        writer = ExportWriter(target, target_fmt, codec, row_group_size, compression_level)
+        try:
+            for chunk in _iter_frames(data):
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        entry = writer.close()
+        manifest.append(entry)
+        logging.info(f"Exported {entry['rows']} rows to {entry['path']} ({entry['format']}/{entry['codec']}, "
+                     f"{entry['bytes'] / 1024 ** 2:.1f} MB in {entry['seconds']:.2f}s)")
+    return manifest
+
+def _csv_stream(source, path):
+    import pyarrow as pa
+    codec = _csv_codec(path)
+    return source if codec in (None, "none") else pa.CompressedInputStream(source, codec)
+
+def read_export(path, fmt=None, columns=None):
+    """
+    Read an exported file back into a DataFrame.
+
+    Parquet and Feather files are memory-mapped, so with columns only those columns' pages are
+    read; compressed CSV has to be decompressed as a whole.
+    """
+    import pyarrow as pa
+    fmt = fmt or format_from_path(path)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    if fmt == "feather":
+        from pyarrow import feather
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    from pyarrow import csv
+    with pa.memory_map(path) as source:
+        table = csv.read_csv(_csv_stream(source, path), convert_options=csv.ConvertOptions(include_columns=columns))
+    return table.to_pandas()
+
+def iter_export(path, fmt=None, columns=None, batch_rows=DEFAULT_ROW_GROUP_ROWS):
+    """
+    Yield an exported file back as DataFrame chunks, through a memory map.
+
+    Parquet chunks hold batch_rows rows and Feather chunks one record batch each; CSV chunks
+    follow pyarrow's read block size.
+    """
+    import pyarrow as pa
+    fmt = fmt or format_from_path(path)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == "feather":
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for idx in range(reader.num_record_batches):
+                batch = reader.get_batch(idx)
+                yield (batch.select(columns) if columns else batch).to_pandas()
+    else:
+        from pyarrow import csv
+        with pa.memory_map(path) as source:
+            reader = csv.open_csv(_csv_stream(source, path),
+                                  convert_options=csv.ConvertOptions(include_columns=columns))
+            for batch in reader:
+                yield batch.to_pandas()
@@ -0,0 +1,169 @@
+"""
+Script Name: Incremental Extraction
+Description: Delta loads for queries that are refreshed on a schedule. The highest value of a watermark
+             column (a timestamp or SQL Server rowversion) is kept per extract in a local SQLite state
+             store. Each refresh only fetches the rows past that watermark and merges them into a Feather
+             copy of the dataset, replacing rows with the same key, so hourly refreshes move only the
+             rows that changed.
+"""
+
+import os
+import json
+import time
+import numbers
+import sqlite3
+import logging
+import threading
+from datetime import datetime, date
+
+import pandas as pd
+
+from automation_toolkit import fetch_records, get_pool, _placeholders
+from instrumentation import instrument
+from resilience import DB_POLICY, retry_call
+from query_cache import cache_key, write_feather, read_feather
+
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser("~"), ".automation_toolkit", "incremental")
+STATE_FILE = "watermarks.db"
+
+def _encode_watermark(value):
+    """Encode a watermark as JSON text that keeps its type."""
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return json.dumps({"type": "timestamp", "value": pd.Timestamp(value).isoformat()})
+    if isinstance(value, (bytes, bytearray)):
+        return json.dumps({"type": "bytes", "value": bytes(value).hex()})  # SQL Server rowversion
+    if isinstance(value, numbers.Integral):
+        return json.dumps({"type": "int", "value": int(value)})
+    if isinstance(value, numbers.Real):
+        return json.dumps({"type": "float", "value": float(value)})
+    return json.dumps({"type": "str", "value": str(value)})
+
+def _decode_watermark(text):
+    """Decode a stored watermark into a value the database drivers can bind."""
+    data = json.loads(text)
+    if data["type"] == "timestamp":
+        return pd.Timestamp(data["value"]).to_pydatetime()
+    if data["type"] == "bytes":
+        return bytes.fromhex(data["value"])
+    return {"int": int, "float": float, "str": str}[data["type"]](data["value"])
+
+class WatermarkStore:
+    """Per-extract watermarks and bookkeeping, kept in a single SQLite file."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks (name TEXT PRIMARY KEY, query_key TEXT NOT NULL, "
+            "watermark TEXT, rows INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def get(self, name):
+        """Return the state of an extract as a dict, or None if it has never been loaded."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT query_key, watermark, rows, updated FROM watermarks WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"query_key": row[0], "watermark": None if row[1] is None else _decode_watermark(row[1]),
+                "rows": row[2], "updated": row[3]}
+
+    def set(self, name, query_key, watermark, rows):
+        encoded = None if watermark is None else _encode_watermark(watermark)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watermarks (name, query_key, watermark, rows, updated) VALUES (?, ?, ?, ?, ?)",
+                (name, query_key, encoded, rows, time.time()),
+            )
+
+    def delete(self, name):
+        """Forget an extract, so the next refresh does a full load."""
+        with self._lock:
+            return self._conn.execute("DELETE FROM watermarks WHERE name = ?", (name,)).rowcount > 0
+
+    def names(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM watermarks ORDER BY name")]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def dataset_path(name, state_dir=DEFAULT_STATE_DIR):
+    """Return the path of the Feather file an extract is persisted in."""
+    return os.path.join(state_dir, f"{name}.feather")
+
+def _max_watermark(df, watermark_column, current=None):
+    values = df[watermark_column].dropna()
+    if values.empty:
+        return current
+    latest = values.max()
+    latest = latest.item() if hasattr(latest, "item") and not isinstance(latest, pd.Timestamp) else latest
+    return latest if current is None or latest > current else current
+
+def _merge(existing, delta, key_columns):
+    """Replace the rows of existing that have a key in delta, and append the rest of delta."""
+    delta = delta.drop_duplicates(subset=key_columns, keep="last")
+    if existing.empty:
+        return delta.reset_index(drop=True)
+    existing_keys = pd.MultiIndex.from_frame(existing[key_columns])
+    delta_keys = pd.MultiIndex.from_frame(delta[key_columns])
+    kept = existing[~existing_keys.isin(delta_keys)]
+    return pd.concat([kept, delta], ignore_index=True)
+
+def _fetch_delta(query, server_type, watermark_column, watermark):
+    """Fetch the rows of a query whose watermark column is past the given value."""
+    with get_pool(server_type).connection() as conn:
+        delta_query = (f"SELECT * FROM ({query}) delta_src "
+                       f"WHERE delta_src.{watermark_column} > {_placeholders(conn, 1)}")
+        return pd.read_sql(delta_query, conn, params=[watermark])
+
+@instrument("fetch_incremental")
+def fetch_incremental(name, query, server_type, watermark_column, key_columns, state_dir=DEFAULT_STATE_DIR,
+                      full_refresh=False, lookback=None):
+    """
+    Return the up-to-date result of a query, fetching only the rows changed since the last refresh.
+
+    The first call (or full_refresh, or a changed query) loads the whole result. Later calls
+    fetch rows whose watermark_column is greater than the highest value seen so far and merge
+    them into the persisted dataset, replacing rows with the same key_columns. lookback
+    (e.g. pd.Timedelta("5min") for timestamps) re-reads a window before the watermark to catch
+    rows committed late with an older value. Rows deleted in the source are not detected; use
+    full_refresh periodically if that matters.
+    """
+    key_columns = [key_columns] if isinstance(key_columns, str) else list(key_columns)
+    os.makedirs(state_dir, exist_ok=True)
+    path = dataset_path(name, state_dir)
+    query_key = cache_key(query, server_type)
+    store = WatermarkStore(os.path.join(state_dir, STATE_FILE))
+    start = time.perf_counter()
+    try:
+        state = store.get(name)
+        if (full_refresh or state is None or state["query_key"] != query_key
+                or state["watermark"] is None or not os.path.exists(path)):
+            df = _merge(pd.DataFrame(), fetch_records(query, server_type), key_columns)
+            watermark = _max_watermark(df, watermark_column)
+            mode = "full load"
+        else:
+            since = state["watermark"] if lookback is None else state["watermark"] - lookback
+            delta = retry_call(lambda: _fetch_delta(query, server_type, watermark_column, since),
+                               f"db.{server_type}", DB_POLICY, operation="fetch_incremental")
+            if delta.empty:
+                logging.info(f"{name}: no new rows since {state['watermark']} ({time.perf_counter() - start:.2f}s)")
+                return read_feather(path)
+            df = _merge(read_feather(path), delta, key_columns)
+            watermark = _max_watermark(delta, watermark_column, state["watermark"])
+            mode = f"{len(delta)} new/changed rows"
+        # Dataset first, then the watermark: a crash in between only re-fetches the same delta.
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        write_feather(df, temp_path)
+        os.replace(temp_path, path)
+        store.set(name, query_key, watermark, len(df))
+    finally:
+        store.close()
+    logging.info(f"{name}: {mode}, {len(df)} rows total, watermark {watermark} "
+                 f"({time.perf_counter() - start:.2f}s)")
+    return df
@@ -0,0 +1,332 @@
+"""
+Script Name: Instrumentation
+Description: Structured timing for the toolkit's hot paths. The instrument decorator and the track context
+             manager record a latency histogram, call and error counts, and rows/bytes processed for each
+             operation in a metrics registry. The registry can be written as JSON or in the Prometheus text
+             format. enable_profiling turns on an opt-in cProfile (and tracemalloc) capture that saves a
+             profile for every call slower than a threshold.
+
+Set TOOLKIT_METRICS_FILE=metrics.json (or metrics.prom) to write the metrics when the process exits.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+import inspect
+import functools
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+METRICS_FILE_ENV_VAR = "TOOLKIT_METRICS_FILE"
+PROMETHEUS_PREFIX = "toolkit_operation"
+
+class Histogram:
+    """Latency histogram with fixed buckets, plus count, sum, min and max."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last slot counts values above every bucket
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        idx = 0
+        while idx < len(self.buckets) and value > self.buckets[idx]:
+            idx += 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[idx] if idx < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count, "sum": self.sum, "min": self.min, "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+class _Operation:
+    """Metrics of one named operation."""
+    def __init__(self, buckets):
+        self.latency = Histogram(buckets)
+        self.errors = {}  # exception type name -> count
+        self.rows = 0
+        self.bytes = 0
+
+class MetricsRegistry:
+    """Thread-safe collection of per-operation metrics."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.enabled = True
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, rows=None, nbytes=None, error=None):
+        """Record one call of an operation."""
+        with self._lock:
+            operation = self._operations.get(name)
+            if operation is None:
+                operation = self._operations[name] = _Operation(self.buckets)
+            operation.latency.observe(seconds)
+            if rows:
+                operation.rows += rows
+            if nbytes:
+                operation.bytes += nbytes
+            if error is not None:
+                error_type = type(error).__name__
+                operation.errors[error_type] = operation.errors.get(error_type, 0) + 1
+
+    def snapshot(self):
+        """Return all metrics as a plain dict, keyed by operation name."""
+        with self._lock:
+            return {
+                name: {"latency": operation.latency.to_dict(), "errors": dict(operation.errors),
+                       "error_count": sum(operation.errors.values()), "rows": operation.rows,
+                       "bytes": operation.bytes}
+                for name, operation in sorted(self._operations.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+    def to_json(self, path=None):
+        """Return the metrics as JSON text, and write it to path if given."""
+        text = json.dumps({"generated": time.time(), "operations": self.snapshot()}, indent=2)
+        if path:
+            _write_text(path, text)
+        return text
+
+    def to_prometheus(self, path=None):
+        """Return the metrics in the Prometheus text exposition format, and write it to path if given."""
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_seconds Latency of toolkit operations.",
+            f"# TYPE {PROMETHEUS_PREFIX}_seconds histogram",
+        ]
+        snapshot = self.snapshot()
+        for name, metrics in snapshot.items():
+            cumulative = 0
+            for bound, count in metrics["latency"]["buckets"].items():
+                cumulative += count
+                lines.append(f'{PROMETHEUS_PREFIX}_seconds_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PROMETHEUS_PREFIX}_seconds_sum{{operation="{name}"}} {metrics["latency"]["sum"]}')
+            lines.append(f'{PROMETHEUS_PREFIX}_seconds_count{{operation="{name}"}} {metrics["latency"]["count"]}')
+        for metric, help_text in (("errors", "Failed calls by exception type."),
+                                  ("rows", "Rows processed."), ("bytes", "Bytes processed.")):
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{metric}_total {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{metric}_total counter")
+            for name, metrics in snapshot.items():
+                if metric == "errors":
+                    for error_type, count in metrics["errors"].items():
+                        lines.append(f'{PROMETHEUS_PREFIX}_errors_total{{operation="{name}",error="{error_type}"}} {count}')
+                else:
+                    lines.append(f'{PROMETHEUS_PREFIX}_{metric}_total{{operation="{name}"}} {metrics[metric]}')
+        text = "\n".join(lines) + "\n"
+        if path:
+            _write_text(path, text)
+        return text
+
+    def export(self, path):
+        """Write the metrics to path, in Prometheus format for .prom/.txt files and JSON otherwise."""
+        if path.endswith((".prom", ".txt")):
+            return self.to_prometheus(path)
+        return self.to_json(path)
+
+REGISTRY = MetricsRegistry()
+
+def _write_text(path, text):
+    """Write a file atomically, so a scraper never reads a half-written export."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+class _Profiler:
+    """Opt-in cProfile/tracemalloc capture of slow calls."""
+    def __init__(self):
+        self.enabled = False
+        self.threshold = 1.0
+        self.directory = "profiles"
+        self.memory = False
+        self._active = threading.local()
+
+    def start(self):
+        """Start profiling the current call; return a profile, or None if one is already running."""
+        if not self.enabled or getattr(self._active, "running", False):
+            return None
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler is active (e.g. a call in another thread)
+            return None
+        self._active.running = True
+        return profile
+
+    def stop(self, profile, name, seconds):
+        """Stop a profile and save it if the call was slower than the threshold."""
+        profile.disable()
+        self._active.running = False
+        if seconds < self.threshold:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        profile.dump_stats(stem + ".prof")
+        logging.warning(f"Slow call: {name} took {seconds:.2f}s; profile saved to {stem}.prof")
+        if self.memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                stats = tracemalloc.take_snapshot().statistics("lineno")[:25]
+                _write_text(stem + ".tracemalloc.txt", "\n".join(
+                    [f"current={current} peak={peak} bytes"] + [str(stat) for stat in stats]) + "\n")
+
+PROFILER = _Profiler()
+
+def enable_profiling(threshold=1.0, directory="profiles", memory=False):
+    """
+    Save a cProfile .prof file for every instrumented call that takes at least threshold seconds.
+
+    With memory=True, tracemalloc is started too and the top allocation sites are saved next to
+    the profile. Profiling slows every instrumented call down, so only enable it while investigating.
+    Calls that run while another call is being profiled (nested or in other threads) are not profiled.
+    """
+    PROFILER.threshold = threshold
+    PROFILER.directory = directory
+    PROFILER.memory = memory
+    PROFILER.enabled = True
+    if memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+def disable_profiling():
+    PROFILER.enabled = False
+    if PROFILER.memory:
+        import tracemalloc
+        tracemalloc.stop()
+        PROFILER.memory = False
+
+class Measurement:
+    """Handle yielded by track(); set rows and nbytes to record how much data the operation handled."""
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.nbytes = None
+        self.seconds = None
+        self.discard = False  # set to skip recording this call
+
+@contextmanager
+def track(name, registry=None, profile=True):
+    """Time a block of code as one call of the operation name; profile=False opts out of profiling."""
+    registry = registry or REGISTRY
+    measurement = Measurement(name)
+    if not registry.enabled:
+        yield measurement
+        return
+    profile = PROFILER.start() if profile else None
+    start = time.perf_counter()
+    error = None
+    try:
+        yield measurement
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        measurement.seconds = time.perf_counter() - start
+        if profile is not None:
+            PROFILER.stop(profile, name, measurement.seconds)
+        if not measurement.discard:
+            # A generator closed early (GeneratorExit) is a partial read, not a failure
+            error = None if isinstance(error, GeneratorExit) else error
+            registry.record(name, measurement.seconds, measurement.rows, measurement.nbytes, error)
+
+def measure_data(result, *args, **kwargs):
+    """Default size measure: rows and shallow in-memory bytes of a DataFrame, or a stats dict's rows."""
+    if hasattr(result, "memory_usage") and hasattr(result, "columns"):
+        return len(result), int(result.memory_usage(index=False, deep=False).sum())
+    if isinstance(result, dict) and "rows" in result:
+        return result["rows"], result.get("bytes")
+    return None, None
+
+def _tracked_generator(name, generator, measure, registry):
+    """
+    Record a generator's whole iteration (not just its creation) as one call, summing chunk sizes.
+
+    Not profiled: the consumer's own work between chunks would be mixed into the profile.
+    """
+    with track(name, registry, profile=False) as measurement:
+        rows = nbytes = 0
+        for chunk in generator:
+            chunk_rows, chunk_bytes = measure(chunk)
+            rows += chunk_rows or 0
+            nbytes += chunk_bytes or 0
+            measurement.rows, measurement.nbytes = rows, nbytes
+            yield chunk
+
+def instrument(name=None, measure=measure_data, registry=None):
+    """
+    Decorator recording every call of a function under name (the function's name by default).
+
+    measure(result, *args, **kwargs) returns (rows, bytes) for the call. Functions returning a
+    generator are timed until the generator is exhausted or closed, and chunk sizes are summed.
+    """
+    def decorator(func):
+        operation = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = registry or REGISTRY
+            if not target.enabled:
+                return func(*args, **kwargs)
+            with track(operation, target) as measurement:
+                result = func(*args, **kwargs)
+                if inspect.isgenerator(result):
+                    measurement.discard = True  # the iteration is recorded instead
+                    return _tracked_generator(operation, result, measure, target)
+                measurement.rows, measurement.nbytes = measure(result, *args, **kwargs)
+            return result
+        return wrapper
+    return decorator
+
+def instrument_methods(prefix, exclude=()):
+    """Class decorator instrumenting every public method of a class as "<prefix>.<method>"."""
+    def decorator(cls):
+        for attribute, value in list(vars(cls).items()):
+            if attribute.startswith("_") or attribute in exclude or not inspect.isfunction(value):
+                continue
+            setattr(cls, attribute, instrument(f"{prefix}.{attribute}")(value))
+        return cls
+    return decorator
+
+def _export_at_exit():
+    path = os.environ.get(METRICS_FILE_ENV_VAR)
+    if path and REGISTRY.snapshot():
+        try:
+            REGISTRY.export(path)
+        except OSError as e:
+            print(f"Could not write metrics to {path}: {e}", file=sys.stderr)
+
+atexit.register(_export_at_exit)
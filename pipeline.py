@@ -0,0 +1,392 @@
+"""
+Script Name: Pipeline Runner
+Description: Runs jobs built from the toolkit's pieces (fetch_records -> transforms -> create_excel) as a
+             DAG of stages declared in Python or YAML. Independent branches run concurrently, and a stage's
+             output chunks are written to Feather part files that downstream stages read while they are
+             still being produced. A stage that finished is checkpointed, so a rerun after a failure resumes
+             from the checkpoints instead of querying the database again. Checkpoints are cleared once
+             a run succeeds, so the next scheduled run starts from fresh data.
+
+Usage:
+    python pipeline.py monthly_report.yaml [--force orders] [--target report]
+
+Example YAML:
+    name: monthly_report
+    checkpoint_dir: checkpoints
+    max_workers: 4
+    stages:
+      orders:
+        call: automation_toolkit.fetch_records
+        params: {query: "SELECT * FROM orders", server_type: SSMS, chunksize: 50000}
+      orders_long:
+        call: useful_snippets.unpivot_dataframe
+        inputs: [orders]
+        mode: stream
+        params: {id_vars: [order_id], value_vars: null}
+      report:
+        call: automation_toolkit.create_excel
+        inputs: {dataframes: [orders_long]}
+        mode: stream
+        params: {path: report.xlsx, sheet_names: [Orders], fast: true}
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import logging
+import argparse
+import tempfile
+import importlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+from query_cache import write_feather, read_feather
+
+DEFAULT_MAX_WORKERS = 4
+SUCCESS_FILE = "_SUCCESS.json"
+MODES = ("frame", "stream", "map")
+
+StageResult = namedtuple("StageResult", ["name", "status", "rows", "seconds", "error", "result"])
+
+class _Channel:
+    """The output chunks of one stage, stored as Feather part files and readable while still being written."""
+    def __init__(self, directory, parts=None, rows=0, done=False):
+        self.directory = directory
+        self.parts = list(parts or [])
+        self.rows = rows
+        self.done = done
+        self.error = None
+        self._cond = threading.Condition()
+
+    def append(self, chunk):
+        path = os.path.join(self.directory, f"part-{len(self.parts):05d}.feather")
+        write_feather(chunk, path)
+        with self._cond:
+            self.parts.append(path)
+            self.rows += len(chunk)
+            self._cond.notify_all()
+
+    def close(self, error=None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def __iter__(self):
+        idx = 0
+        while True:
+            with self._cond:
+                while idx >= len(self.parts) and not self.done:
+                    self._cond.wait()
+                if idx >= len(self.parts):
+                    if self.error is not None:
+                        raise RuntimeError(f"Upstream stage failed: {self.error}")
+                    return
+                path = self.parts[idx]
+            idx += 1
+            yield read_feather(path)
+
+    def frame(self):
+        chunks = list(self)
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+def _iter_output(output):
+    """Yield the DataFrames of a stage's return value (a DataFrame or an iterable of them)."""
+    if isinstance(output, pd.DataFrame):
+        yield output
+        return
+    for chunk in output:
+        if isinstance(chunk, pd.DataFrame):
+            yield chunk
+        else:
+            raise TypeError(f"Stage output chunks must be DataFrames, got {type(chunk).__name__}")
+
+def _is_frames(output):
+    """Return True if a stage returned data (a DataFrame, list of DataFrames or generator)."""
+    if isinstance(output, pd.DataFrame) or inspect.isgenerator(output) or hasattr(output, "__next__"):
+        return True
+    return isinstance(output, (list, tuple)) and bool(output) and all(
+        isinstance(item, pd.DataFrame) for item in output)
+
+def _resolve(call):
+    """Import "module.function" and return the function."""
+    module_name, _, attribute = call.rpartition(".")
+    if not module_name:
+        raise ValueError(f"Stage call must be 'module.function', got '{call}'")
+    return getattr(importlib.import_module(module_name), attribute)
+
+class Stage:
+    """
+    One step of a pipeline.
+
+    inputs is a list of upstream stage names passed positionally, or a dict mapping keyword
+    arguments to a stage name or a list of stage names. mode decides what the inputs are:
+    "frame" passes each upstream output as one DataFrame, "stream" passes an iterator of its
+    chunks (for functions that accept chunk iterables, such as unpivot_dataframe, create_excel and
+    write_records), and "map" calls the function once per chunk of a single input.
+    """
+    def __init__(self, name, func, inputs=(), params=None, mode="frame", checkpoint=True):
+        if mode not in MODES:
+            raise ValueError(f"Stage mode must be one of {', '.join(MODES)}")
+        self.name = name
+        self.func = _resolve(func) if isinstance(func, str) else func
+        self.inputs = inputs if isinstance(inputs, dict) else list(inputs)
+        self.params = dict(params or {})
+        self.mode = mode
+        self.checkpoint = checkpoint
+        if mode == "map" and len(self.upstream()) != 1:
+            raise ValueError(f"Stage '{name}' in map mode needs exactly one input")
+
+    def upstream(self):
+        """Return the names of the stages this stage reads from."""
+        if isinstance(self.inputs, list):
+            return list(self.inputs)
+        names = []
+        for value in self.inputs.values():
+            names.extend(value if isinstance(value, list) else [value])
+        return names
+
+    def describe(self):
+        """Return the parts of the stage definition that decide whether a checkpoint is still valid."""
+        func = f"{getattr(self.func, '__module__', '')}.{getattr(self.func, '__qualname__', repr(self.func))}"
+        return json.dumps({"func": func, "inputs": self.inputs, "params": self.params, "mode": self.mode},
+                          sort_keys=True, default=repr)
+
+class Pipeline:
+    """
+    A DAG of stages with concurrent execution, chunk streaming and Feather checkpoints.
+
+    Without a checkpoint_dir nothing is kept between runs. After a failed run, a stage is resumed
+    from its checkpoint when its definition and all upstream stages are unchanged; otherwise it
+    and everything downstream of it run again. A successful run clears the checkpoints of the
+    stages it ran.
+    """
+    def __init__(self, name, checkpoint_dir=None, max_workers=DEFAULT_MAX_WORKERS):
+        self.name = name
+        self.checkpoint_dir = checkpoint_dir
+        self.max_workers = max_workers
+        self.stages = {}
+
+    def add(self, name, func, inputs=(), mode="frame", checkpoint=True, **params):
+        """Add a stage; extra keyword arguments are passed to func. Returns the pipeline."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage name: {name}")
+        self.stages[name] = Stage(name, func, inputs, params, mode, checkpoint)
+        return self
+
+    def stage(self, name=None, inputs=(), mode="frame", checkpoint=True, **params):
+        """Decorator form of add."""
+        def decorator(func):
+            self.add(name or func.__name__, func, inputs, mode, checkpoint, **params)
+            return func
+        return decorator
+
+    @classmethod
+    def from_dict(cls, spec):
+        """Build a pipeline from a dict with name, checkpoint_dir, max_workers and stages."""
+        pipeline = cls(spec["name"], spec.get("checkpoint_dir"), spec.get("max_workers", DEFAULT_MAX_WORKERS))
+        for name, stage in spec["stages"].items():
+            pipeline.add(name, stage["call"], stage.get("inputs", ()), stage.get("mode", "frame"),
+                         stage.get("checkpoint", True), **stage.get("params", {}))
+        return pipeline
+
+    @classmethod
+    def from_yaml(cls, path):
+        """Build a pipeline from a YAML file (see the module docstring for the format)."""
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("YAML pipelines require the 'PyYAML' package") from e
+        with open(path) as f:
+            return cls.from_dict(yaml.safe_load(f))
+
+    def _order(self, targets=None):
+        """Return the stages needed for targets (all stages by default) in topological order."""
+        for stage in self.stages.values():
+            unknown = [name for name in stage.upstream() if name not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' reads from unknown stage(s): {', '.join(unknown)}")
+        order, state = [], {}
+
+        def visit(name):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Pipeline has a cycle through stage '{name}'")
+            state[name] = "visiting"
+            for upstream in self.stages[name].upstream():
+                visit(upstream)
+            state[name] = "done"
+            order.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return order
+
+    def _stage_dir(self, name, workdir):
+        if self.checkpoint_dir and self.stages[name].checkpoint:
+            return os.path.join(self.checkpoint_dir, self.name, name)
+        return os.path.join(workdir, name)
+
+    @staticmethod
+    def _load_marker(directory):
+        try:
+            with open(os.path.join(directory, SUCCESS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_marker(directory, marker):
+        """Write the checkpoint marker atomically; a stage without one is not resumed."""
+        temp_path = os.path.join(directory, SUCCESS_FILE + ".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(marker, f, indent=2, default=str)
+        os.replace(temp_path, os.path.join(directory, SUCCESS_FILE))
+
+    def _inputs(self, stage, channels):
+        """Return the positional and keyword arguments a stage is called with."""
+        def read(name):
+            return channels[name].frame() if stage.mode == "frame" else iter(channels[name])
+        if isinstance(stage.inputs, list):
+            return [read(name) for name in stage.inputs], {}
+        kwargs = {key: [read(name) for name in value] if isinstance(value, list) else read(value)
+                  for key, value in stage.inputs.items()}
+        return [], kwargs
+
+    def _run_stage(self, stage, channel, fingerprint, checkpointed):
+        """Run one stage, writing its output chunks to its channel; return (rows, seconds, result)."""
+        start = time.perf_counter()
+        result = None
+        try:
+            args, kwargs = self._inputs(stage, self._channels)
+            if stage.mode == "map":
+                for chunk in args[0]:
+                    for out in _iter_output(stage.func(chunk, **stage.params)):
+                        channel.append(out)
+            else:
+                output = stage.func(*args, **kwargs, **stage.params)
+                if _is_frames(output):
+                    for chunk in _iter_output(output):
+                        channel.append(chunk)
+                else:
+                    result = output
+        except BaseException as e:
+            channel.close(e)
+            raise
+        channel.close()
+        seconds = time.perf_counter() - start
+        if checkpointed:
+            self._save_marker(channel.directory, {
+                "fingerprint": fingerprint, "parts": [os.path.basename(path) for path in channel.parts],
+                "rows": channel.rows, "seconds": seconds, "result": result, "finished": time.time(),
+            })
+        return channel.rows, seconds, result
+
+    def run(self, targets=None, force=()):
+        """
+        Run the pipeline (or only what targets need) and return a StageResult per stage, in order.
+
+        Stages in force are rerun even if they have a valid checkpoint. A stage starts when its
+        inputs have finished, or in stream and map mode as soon as its inputs have started.
+        A failed stage marks everything downstream of it as skipped; other branches keep running.
+        """
+        order = self._order(targets)
+        workdir = tempfile.mkdtemp(prefix=f"pipeline_{self.name}_")
+        fingerprints, rerun, self._channels = {}, set(), {}
+        results, status = {}, {}
+        for name in order:
+            stage = self.stages[name]
+            fingerprints[name] = hashlib.sha256("\n".join(
+                [stage.describe()] + [fingerprints[upstream] for upstream in stage.upstream()]
+            ).encode("utf-8")).hexdigest()
+            directory = self._stage_dir(name, workdir)
+            marker = self._load_marker(directory) if self.checkpoint_dir and stage.checkpoint else None
+            if (name in force or marker is None or marker["fingerprint"] != fingerprints[name]
+                    or any(upstream in rerun for upstream in stage.upstream())):
+                rerun.add(name)
+                shutil.rmtree(directory, ignore_errors=True)
+                os.makedirs(directory)
+                self._channels[name] = _Channel(directory)
+                status[name] = "pending"
+            else:
+                parts = [os.path.join(directory, part) for part in marker["parts"]]
+                self._channels[name] = _Channel(directory, parts, marker["rows"], done=True)
+                results[name] = StageResult(name, "resumed", marker["rows"], 0.0, None, marker["result"])
+                status[name] = "resumed"
+                logging.info(f"Stage {name}: resumed from checkpoint ({marker['rows']} rows)")
+
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"pipeline_{self.name}")
+        running = {}
+        try:
+            while True:
+                for name in order:
+                    if status[name] != "pending":
+                        continue
+                    stage = self.stages[name]
+                    upstream = [status[dep] for dep in stage.upstream()]
+                    if any(state in ("failed", "skipped") for state in upstream):
+                        status[name] = "skipped"
+                        self._channels[name].close(RuntimeError("upstream stage failed"))
+                        results[name] = StageResult(name, "skipped", 0, 0.0, None, None)
+                        logging.warning(f"Stage {name}: skipped because an upstream stage failed")
+                        continue
+                    ready = ("done", "resumed") if stage.mode == "frame" else ("done", "resumed", "running")
+                    if all(state in ready for state in upstream):
+                        # Executor threads start in submission order, so producers always start before
+                        # the streaming consumers that wait on them.
+                        status[name] = "running"
+                        checkpointed = bool(self.checkpoint_dir) and stage.checkpoint
+                        future = executor.submit(self._run_stage, stage, self._channels[name],
+                                                 fingerprints[name], checkpointed)
+                        running[future] = name
+                        logging.info(f"Stage {name}: started")
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        rows, seconds, result = future.result()
+                        status[name] = "done"
+                        results[name] = StageResult(name, "done", rows, seconds, None, result)
+                        logging.info(f"Stage {name}: done ({rows} rows in {seconds:.2f}s)")
+                    except Exception as e:
+                        status[name] = "failed"
+                        results[name] = StageResult(name, "failed", self._channels[name].rows, 0.0, e, None)
+                        logging.error(f"Stage {name}: failed: {e}")
+        finally:
+            executor.shutdown(wait=True)
+            shutil.rmtree(workdir, ignore_errors=True)
+        failed = sum(result.status in ("failed", "skipped") for result in results.values())
+        if self.checkpoint_dir and not failed:
+            # Checkpoints only serve a rerun after a failure; the next run must query fresh data.
+            for name in order:
+                if self.stages[name].checkpoint:
+                    shutil.rmtree(self._stage_dir(name, workdir), ignore_errors=True)
+        logging.info(f"Pipeline {self.name} finished in {time.perf_counter() - start:.1f}s: "
+                     f"{len(results) - failed} of {len(results)} stages succeeded")
+        return [results[name] for name in order]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a YAML pipeline definition.")
+    parser.add_argument("spec", help="pipeline YAML file")
+    parser.add_argument("--force", nargs="+", default=[], help="stages to rerun even if checkpointed")
+    parser.add_argument("--target", nargs="+", help="only run these stages and what they need")
+    args = parser.parse_args(argv)
+    results = Pipeline.from_yaml(args.spec).run(targets=args.target, force=args.force)
+    for result in results:
+        print(f"{result.name:<24} {result.status:<8} {result.rows:>10} rows {result.seconds:8.2f}s"
+              + (f"  {result.error}" if result.error else ""))
+    return 1 if any(result.status in ("failed", "skipped") for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Script Name: Query Result Cache
+Description: Caches fetch_records results keyed on the normalized SQL text and server type. Entries
+             expire after a TTL and are evicted least-recently-used by total byte size. Small frames
+             are kept in memory; large frames (and, with persist, every frame) are written to Feather
+             files in a cache directory, so warm runs can skip the database entirely. Processes sharing
+             a cache directory update its index under a file lock, re-reading it first.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_TTL = 3600  # seconds
+DEFAULT_MAX_MEMORY_BYTES = 256 * 1024 ** 2
+DEFAULT_MAX_DISK_BYTES = 4 * 1024 ** 3
+DEFAULT_SPILL_BYTES = 16 * 1024 ** 2  # frames at least this large go to disk instead of memory
+INDEX_FILE = "index.json"
+
+def normalize_query(query):
+    """Normalize SQL text so formatting-only differences map to the same cache entry."""
+    from sql_normalizer import normalize
+    return normalize(query)
+
+def cache_key(query, server_type):
+    """Return the cache key for a query on a server type."""
+    text = f"{server_type}\n{normalize_query(query)}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def write_feather(df, path):
+    """Write a DataFrame to a Feather (Arrow IPC) file."""
+    from pyarrow import feather
+    feather.write_feather(df.reset_index(drop=True), path)
+
+def read_feather(path):
+    """Read a Feather file through a memory map, so only the pages used are loaded."""
+    from pyarrow import feather
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+def frame_nbytes(df):
+    """Return the in-memory size of a DataFrame in bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class QueryCache:
+    """Two-tier (memory + Feather on disk) cache of query results with TTL and LRU eviction."""
+    def __init__(self, cache_dir=None, ttl=DEFAULT_TTL, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES, spill_bytes=DEFAULT_SPILL_BYTES, persist=True):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.spill_bytes = spill_bytes
+        self.persist = persist
+        self._memory = OrderedDict()  # key -> (df, expires, nbytes)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._index = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._index = self._load_index()
+
+    # Disk tier
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _load_index(self):
+        """Load the disk index, dropping entries whose files have disappeared."""
+        try:
+            with open(self._index_path()) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {key: entry for key, entry in index.items()
+                if os.path.exists(os.path.join(self.cache_dir, entry["file"]))}
+
+    def _save_index(self):
+        """Write the disk index atomically (the index lock must be held)."""
+        tmp_path = f"{self._index_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path())
+
+    @contextmanager
+    def _index_locked(self):
+        """
+        Hold the index's file lock with an up-to-date view of it, and write it back on exit.
+
+        Other processes sharing cache_dir may have added or removed entries since it was last read.
+        """
+        from automation_toolkit import file_lock
+        with file_lock(self._index_path()):
+            self._index = self._load_index()
+            yield
+            self._save_index()
+
+    def _last_access(self, key):
+        """Return when an entry was last read: hits touch the file instead of rewriting the index."""
+        try:
+            return os.path.getmtime(os.path.join(self.cache_dir, self._index[key]["file"]))
+        except OSError:
+            return 0.0
+
+    def _remove_file(self, key):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except OSError:
+                pass
+
+    def _spill(self, key, df, expires, nbytes):
+        """Write a frame to a Feather file and record it in the index."""
+        file_name = f"{key}.feather"
+        path = os.path.join(self.cache_dir, file_name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            write_feather(df, tmp_path)
+        except Exception as e:
+            logging.warning(f"Could not spill cache entry to disk: {e}")
+            return False
+        with self._index_locked():
+            os.replace(tmp_path, path)
+            self._index[key] = {"file": file_name, "expires": expires, "nbytes": os.path.getsize(path),
+                                "memory_bytes": nbytes}
+            self._evict_disk()
+        return key in self._index
+
+    def _evict_disk(self):
+        """Drop least recently used files until the disk tier fits in max_disk_bytes."""
+        total = sum(entry["nbytes"] for entry in self._index.values())
+        for key in sorted(self._index, key=self._last_access):
+            if total <= self.max_disk_bytes:
+                break
+            total -= self._index[key]["nbytes"]
+            self._remove_file(key)
+
+    # Memory tier
+    def _evict_memory(self):
+        """Drop least recently used frames until the memory tier fits in max_memory_bytes."""
+        while self._memory and self._memory_bytes > self.max_memory_bytes:
+            key, (df, expires, nbytes) = self._memory.popitem(last=False)
+            self._memory_bytes -= nbytes
+            if self.cache_dir and key not in self._index and expires > time.time():
+                self._spill(key, df, expires, nbytes)
+
+    def _drop_memory(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+    # Public API
+    def get(self, query, server_type):
+        """Return the cached DataFrame for a query, or None on a miss or expired entry."""
+        key = cache_key(query, server_type)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                df, expires, _ = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    return df.copy()
+                self._drop_memory(key)
+            if not self.cache_dir:
+                return None
+            if key not in self._index:
+                self._index = self._load_index()  # another process may have stored it
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            if entry["expires"] <= now:
+                with self._index_locked():
+                    entry = self._index.get(key)
+                    if entry is not None and entry["expires"] <= now:  # not refreshed by another process
+                        self._remove_file(key)
+                return None
+            path = os.path.join(self.cache_dir, entry["file"])
+        try:
+            df = read_feather(path)
+        except Exception as e:
+            logging.warning(f"Could not read cache entry {path}: {e}")
+            with self._lock, self._index_locked():
+                self._remove_file(key)
+            return None
+        try:
+            os.utime(path)  # the file's mtime is the entry's last access, for LRU eviction
+        except OSError:
+            pass
+        return df
+
+    def put(self, query, server_type, df, ttl=None):
+        """Store a query result."""
+        key = cache_key(query, server_type)
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        nbytes = frame_nbytes(df)
+        with self._lock:
+            self._drop_memory(key)
+            on_disk = False
+            if self.cache_dir and (self.persist or nbytes >= self.spill_bytes):
+                on_disk = self._spill(key, df, expires, nbytes)
+            if nbytes < self.spill_bytes or not on_disk:
+                self._memory[key] = (df.copy(), expires, nbytes)
+                self._memory_bytes += nbytes
+                self._evict_memory()
+
+    def invalidate(self, query, server_type):
+        """Remove a single query from the cache."""
+        key = cache_key(query, server_type)
+        with self._lock:
+            self._drop_memory(key)
+            if self.cache_dir:
+                with self._index_locked():
+                    self._remove_file(key)
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self.cache_dir:
+                with self._index_locked():
+                    for key in list(self._index):
+                        self._remove_file(key)
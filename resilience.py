@@ -0,0 +1,337 @@
+"""
+Script Name: Resilience
+Description: Retries, backoff, circuit breakers and deadlines shared by the database and browser paths.
+             Errors are classified as transient (dropped connections, unreachable listeners, deadlocks,
+             page-load timeouts, lost browser sessions) or permanent (bad SQL, missing elements) from their
+             type names and messages, so no driver has to be imported. Transient errors are retried with
+             exponential backoff and full jitter. A circuit breaker per target (a server type or web host)
+             stops calls to a target that keeps failing, and a deadline set around a block bounds every
+             retry, sleep and driver timeout inside it. Retries and the time they cost are recorded in the
+             instrumentation registry.
+"""
+
+import re
+import math
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from instrumentation import REGISTRY
+
+DEFAULT_FAILURE_THRESHOLD = 5  # consecutive transient failures that open a circuit
+DEFAULT_RESET_TIMEOUT = 30.0  # seconds an open circuit rejects calls before letting a probe through
+
+# Errors that are never retried, matched on the names of the exception's classes
+FATAL_ERROR_TYPES = {
+    "ProgrammingError", "IntegrityError", "DataError", "NotSupportedError",  # DB-API / SQLAlchemy
+    "NoSuchElementException", "InvalidSelectorException", "InvalidArgumentException", "JavascriptException",
+    "ValueError", "TypeError", "KeyError", "CircuitOpenError", "DeadlineExceeded",
+}
+# Errors that are always retried
+RETRYABLE_ERROR_TYPES = {
+    "ConnectionError", "TimeoutError",
+    "TimeoutException", "StaleElementReferenceException", "ElementClickInterceptedException",
+    "InvalidSessionIdException", "NoSuchWindowException",
+}
+# Other errors are retried when their message carries one of these driver codes or phrases
+TRANSIENT_MESSAGES = re.compile(
+    r"ORA-(?:00060|03113|03114|03135|12170|12514|12516|12519|12520|12521|12528|12537|12541|12543|12547|12571|25408)"
+    r"|\b(?:08S01|08001|08004|08007|40001|HYT00|HYT01)\b"  # ODBC SQLSTATEs: link failure, deadlock, timeout
+    r"|TNS:|deadlock|database is locked|communication link failure|server has gone away|lost connection"
+    r"|connection (?:reset|refused|closed|timed out|was killed)|timeout expired"
+    r"|chrome not reachable|disconnected|session deleted|invalid session id|target closed|net::ERR_",
+    re.IGNORECASE,
+)
+# Browser errors after which the session is gone and has to be restarted
+SESSION_LOST_TYPES = {"InvalidSessionIdException", "NoSuchWindowException"}
+SESSION_LOST_MESSAGES = re.compile(
+    r"chrome not reachable|disconnected|session deleted|invalid session id|target closed", re.IGNORECASE)
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a target whose circuit breaker is open."""
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the deadline of the enclosing deadline() block has passed."""
+
+def _error_chain(error):
+    """Yield an exception and the exceptions it was raised from (pandas wraps driver errors)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+def _type_names(error):
+    return {cls.__name__ for cls in type(error).__mro__}
+
+def is_retryable(error):
+    """Return True if an error looks transient, so the call that raised it is worth repeating."""
+    for link in _error_chain(error):
+        names = _type_names(link)
+        if names & FATAL_ERROR_TYPES:
+            return False
+        if names & RETRYABLE_ERROR_TYPES or getattr(link, "connection_invalidated", False):
+            return True
+        if TRANSIENT_MESSAGES.search(str(link)):
+            return True
+    return False
+
+def is_session_lost(error):
+    """Return True if a browser error means the WebDriver session has died."""
+    return any(_type_names(link) & SESSION_LOST_TYPES or SESSION_LOST_MESSAGES.search(str(link))
+               for link in _error_chain(error))
+
+class RetryPolicy:
+    """
+    How often and how patiently to retry.
+
+    attempts counts the first call. The wait before retry n is drawn uniformly from
+    [0, min(max_delay, base_delay * multiplier ** (n - 1))] ("full jitter"), so clients that
+    failed together do not retry in lockstep; with jitter=False the upper bound is used.
+    retryable decides which errors are retried.
+    """
+    def __init__(self, attempts=4, base_delay=0.5, max_delay=30.0, multiplier=2.0, jitter=True,
+                 retryable=is_retryable):
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retryable = retryable
+
+    def backoff(self, retry):
+        """Return the seconds to wait before the given retry (1 for the first)."""
+        cap = min(self.max_delay, self.base_delay * self.multiplier ** (retry - 1))
+        return random.uniform(0, cap) if self.jitter else cap
+
+DB_POLICY = RetryPolicy(attempts=4, base_delay=1.0, max_delay=30.0)
+BROWSER_POLICY = RetryPolicy(attempts=3, base_delay=0.5, max_delay=10.0)
+NO_RETRY = RetryPolicy(attempts=1)
+
+class CircuitBreaker:
+    """
+    Per-target breaker: closed, open after failure_threshold consecutive transient failures,
+    then half-open after reset_timeout seconds, when one probe call is let through. The probe
+    closes the circuit if it succeeds and reopens it if it fails.
+    """
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = None
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError if the target should not be called now."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "open":
+                wait = self._opened_at + self.reset_timeout - now
+                if wait > 0:
+                    raise CircuitOpenError(f"Circuit for {self.name} is open; next probe in {wait:.0f}s")
+                self.state = "half_open"
+                self._probe_started = now
+                logging.info(f"Circuit for {self.name} is half-open; probing")
+            elif self.state == "half_open":
+                # One probe at a time; a probe that never reported back is replaced after reset_timeout
+                if now - self._probe_started < self.reset_timeout:
+                    raise CircuitOpenError(f"Circuit for {self.name} is half-open; a probe is in flight")
+                self._probe_started = now
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logging.info(f"Circuit for {self.name} closed")
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                logging.warning(f"Circuit for {self.name} opened after {self.failures} failure(s); "
+                                f"rejecting calls for {self.reset_timeout}s")
+
+# Breaker registry, one breaker per target
+_breakers = {}
+_breaker_settings = {}
+_breakers_lock = threading.Lock()
+
+def configure_breaker(target, **settings):
+    """Set breaker options (failure_threshold, reset_timeout) for a target."""
+    with _breakers_lock:
+        _breaker_settings.setdefault(target, {}).update(settings)
+        _breakers.pop(target, None)  # rebuilt with the new settings on next use
+
+def get_breaker(target):
+    """Return the circuit breaker of a target, creating it on first use."""
+    with _breakers_lock:
+        breaker = _breakers.get(target)
+        if breaker is None:
+            breaker = _breakers[target] = CircuitBreaker(target, **_breaker_settings.get(target, {}))
+        return breaker
+
+def breaker_states():
+    """Return {target: {"state", "failures"}} for every breaker in use."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: {"state": breaker.state, "failures": breaker.failures} for breaker in breakers}
+
+def reset_breakers():
+    """Close every circuit (e.g. after the failing system has been fixed)."""
+    with _breakers_lock:
+        _breakers.clear()
+
+_deadline = ContextVar("resilience_deadline", default=None)  # time.monotonic() value, or None
+
+@contextmanager
+def deadline(seconds):
+    """
+    Bound the calls inside the block to seconds from now.
+
+    Retries stop, backoff sleeps are cut short and driver timeouts (query, pool borrow, page
+    load and element waits) are lowered to the time left. Nested deadlines can only shorten the
+    enclosing one. The deadline follows the context into fetch_records_batch workers and
+    AsyncWebDriverManager calls.
+    """
+    end = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(end if current is None else min(end, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining():
+    """Return the seconds left before the current deadline, or None if there is none."""
+    end = _deadline.get()
+    return None if end is None else max(0.0, end - time.monotonic())
+
+def bounded(timeout):
+    """Return timeout lowered to the time left before the current deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
+
+def check_deadline():
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    if remaining() == 0:
+        raise DeadlineExceeded("Deadline exceeded")
+
+@contextmanager
+def query_timeout(conn):
+    """
+    Lower a DB-API connection's call timeout to the time left before the deadline, for the block.
+
+    Uses call_timeout (milliseconds) on cx_Oracle and timeout (seconds) on pyodbc; other drivers
+    are left alone. The previous value is restored afterwards, as pooled connections are reused.
+    """
+    left = remaining()
+    if left is None:
+        yield conn
+        return
+    if hasattr(conn, "call_timeout"):
+        attribute, value = "call_timeout", max(1, int(left * 1000))
+    elif type(conn).__module__.split(".")[0] == "pyodbc":
+        attribute, value = "timeout", max(1, math.ceil(left))
+    else:
+        yield conn
+        return
+    previous = getattr(conn, attribute)
+    setattr(conn, attribute, value)
+    try:
+        yield conn
+    finally:
+        try:
+            setattr(conn, attribute, previous)
+        except Exception as e:
+            logging.debug(f"Could not restore {attribute} on connection: {e}")
+
+_active_targets = ContextVar("resilience_active_targets", default=frozenset())
+
+def retry_call(func, target, policy=None, operation=None, on_retry=None, retryable=None, registry=None):
+    """
+    Call func() under target's circuit breaker, retrying transient errors with backoff.
+
+    Returns func's result, or raises its last error once the attempts or the deadline run out.
+    Permanent errors are raised at once. on_retry(error) runs before each retry (e.g. to restart
+    a dead browser); retryable overrides the policy's classifier. A call nested in another
+    retry_call on the same target runs once, so retries are not multiplied. Each retry is
+    recorded in the registry as operation "retry.<target>": its latency is the time lost (the
+    failed attempt plus the backoff sleep) and its error the exception retried; calls rejected
+    by an open circuit are recorded as "circuit_open.<target>".
+    """
+    active = _active_targets.get()
+    if target in active:
+        return func()
+    policy = policy or DB_POLICY
+    retryable = retryable or policy.retryable
+    registry = registry or REGISTRY
+    operation = operation or target
+    breaker = get_breaker(target)
+    token = _active_targets.set(active | {target})
+    try:
+        attempt, last_error = 0, None
+        while True:
+            try:
+                breaker.before_call()
+                check_deadline()
+            except (CircuitOpenError, DeadlineExceeded) as e:
+                if isinstance(e, CircuitOpenError):
+                    registry.record(f"circuit_open.{target}", 0.0, error=e)
+                raise e from last_error
+            attempt += 1
+            start = time.monotonic()
+            try:
+                if last_error is not None and on_retry is not None:
+                    on_retry(last_error)
+                result = func()
+            except Exception as error:
+                if not retryable(error):
+                    breaker.record_success()  # the target answered; the call itself is wrong
+                    raise
+                breaker.record_failure()
+                delay = policy.backoff(attempt)
+                left = remaining()
+                if attempt >= policy.attempts or (left is not None and left <= delay):
+                    logging.error(f"{operation}: giving up after {attempt} attempt(s): {type(error).__name__}: {error}")
+                    raise
+                logging.warning(f"{operation}: attempt {attempt} of {policy.attempts} failed "
+                                f"({type(error).__name__}: {error}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                registry.record(f"retry.{target}", time.monotonic() - start, error=error)
+                last_error = error
+            else:
+                breaker.record_success()
+                return result
+    finally:
+        _active_targets.reset(token)
+
+def retry_stream(open_stream, target, policy=None, operation=None):
+    """
+    Yield the chunks of the generator open_stream() returns, retrying until the first chunk arrives.
+
+    Errors after a chunk has been yielded are raised, since restarting would repeat rows.
+    """
+    state = {}
+
+    def first_chunk():
+        state["stream"] = open_stream()
+        return next(state["stream"], state)
+
+    chunk = retry_call(first_chunk, target, policy, operation)
+    if chunk is state:
+        return
+    yield chunk
+    yield from state["stream"]
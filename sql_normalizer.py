@@ -0,0 +1,204 @@
+"""
+Script Name: SQL Normalizer
+Description: Formats and normalizes SQL text for logging, deduplication and cache keys. Formatted output is
+             memoized in a bounded LRU keyed by a hash of the raw text, so repeated queries are formatted
+             once. fingerprint strips literals and comments so queries that differ only in their values
+             group together (for metrics), and format_many formats large batches across a process pool.
+"""
+
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CACHE_SIZE = 4096  # formatted queries kept in memory
+PARALLEL_THRESHOLD = 500  # batches with fewer uncached queries are formatted in-process
+
+# One alternative per token class; literals and comments are matched before numbers so that digits
+# inside strings are not touched.
+_TOKENS = re.compile(r"""
+    (?P<string>N?'(?:[^']|'')*')
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<quoted>"(?:[^"]|"")*"|\[[^\]]*\]|`[^`]*`)
+  | (?P<bind>(?<![:\w])[:@](?:[A-Za-z_]\w*|\d+)|\?)
+  | (?P<hex>\b0x[0-9A-Fa-f]+\b)
+  | (?P<number>(?<![\w.])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b)
+""", re.VERBOSE | re.DOTALL)
+_VERBATIM = {"string", "comment", "quoted"}  # token classes whose whitespace is significant
+_PUNCTUATION_SPACE = re.compile(r"\s*([=<>!]+|,|\()\s*|\s*(\))")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+
+class _LRU:
+    """Thread-safe bounded mapping that evicts the least recently used entry."""
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def resize(self, size):
+        with self._lock:
+            self.size = size
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+_cache = _LRU(DEFAULT_CACHE_SIZE)
+
+def text_hash(query):
+    """Return the hash the caches are keyed by (the raw text is not kept as a key)."""
+    return hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+
+def _format(query):
+    """Format SQL with sql_formatter, or only collapse whitespace if it is not installed."""
+    try:
+        from sql_formatter.core import format_sql as sql_formatter_format
+    except ImportError:
+        return collapse_whitespace(query)
+    return sql_formatter_format(query)
+
+def collapse_whitespace(query):
+    """
+    Collapse runs of whitespace to one space, outside string literals, quoted names and comments.
+
+    A -- comment keeps the line break that ends it, so the text after it is not pulled into it.
+    """
+    parts = []
+    last = 0
+    for match in _TOKENS.finditer(query):
+        if match.lastgroup not in _VERBATIM:
+            continue
+        text = re.sub(r"\s+", " ", query[last:match.start()])
+        parts.append(text.lstrip() if parts and parts[-1].endswith("\n") else text)
+        token = match.group()
+        parts.append(token + "\n" if token.startswith("--") else token)
+        last = match.end()
+    text = re.sub(r"\s+", " ", query[last:])
+    parts.append(text.lstrip() if parts and parts[-1].endswith("\n") else text)
+    return "".join(parts).strip()
+
+def format_sql(query):
+    """Return query formatted by sql_formatter, memoized."""
+    key = "format:" + text_hash(query)
+    formatted = _cache.get(key)
+    if formatted is None:
+        formatted = _format(query)
+        _cache.put(key, formatted)
+    return formatted
+
+def normalize(query):
+    """
+    Return the query with whitespace collapsed outside literals and comments, memoized.
+
+    Used for cache keys, so formatting-only differences compare equal. sql_formatter is not used
+    here: it collapses whitespace inside string literals, which would map different queries to one key.
+    """
+    key = "normalize:" + text_hash(query)
+    result = _cache.get(key)
+    if result is None:
+        result = collapse_whitespace(query)
+        _cache.put(key, result)
+    return result
+
+def _strip(match):
+    kind = match.lastgroup
+    if kind == "comment":
+        return " "
+    if kind == "quoted":
+        return match.group()
+    return "?"  # literals and bind parameters
+
+def fingerprint(query):
+    """
+    Return the query with literals, bind parameters and comments replaced, memoized.
+
+    String and numeric literals become ?, IN lists and multi-row VALUES lists collapse to one
+    entry, whitespace is collapsed (and dropped around operators, commas and parentheses) and the
+    text is lower-cased outside quoted identifiers, so "SELECT * FROM t WHERE id IN (1, 2)" and
+    "select *  from t where id in (7)" share a fingerprint.
+    """
+    key = "fingerprint:" + text_hash(query)
+    result = _cache.get(key)
+    if result is None:
+        parts = []
+        last = 0
+        for match in _TOKENS.finditer(query):
+            parts.append(query[last:match.start()].lower())
+            parts.append(_strip(match))
+            last = match.end()
+        parts.append(query[last:].lower())
+        result = _PUNCTUATION_SPACE.sub(lambda match: match.group(1) or match.group(2), " ".join("".join(parts).split()))
+        result = _IN_LIST.sub("(?)", result)
+        result = _VALUES_LIST.sub(r"\1", result)
+        _cache.put(key, result)
+    return result
+
+def fingerprint_id(query):
+    """Return a short, stable id of a query's fingerprint, e.g. for metric names and cache keys."""
+    return hashlib.blake2b(fingerprint(query).encode("utf-8"), digest_size=8).hexdigest()
+
+def format_many(queries, processes=None, chunksize=64):
+    """
+    Format a batch of queries and return them in input order.
+
+    Cached and duplicate queries are formatted once; when at least PARALLEL_THRESHOLD distinct
+    queries are uncached they are formatted across a process pool. Callers on Windows must run
+    this under an `if __name__ == "__main__":` guard.
+    """
+    keys = ["format:" + text_hash(query) for query in queries]
+    results = {}
+    pending = {}
+    for key, query in zip(keys, queries):
+        if key in results or key in pending:
+            continue
+        formatted = _cache.get(key)
+        if formatted is None:
+            pending[key] = query
+        else:
+            results[key] = formatted
+    if len(pending) >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            formatted = list(executor.map(_format, pending.values(), chunksize=chunksize))
+    else:
+        formatted = [_format(query) for query in pending.values()]
+    for key, text in zip(pending, formatted):
+        _cache.put(key, text)
+        results[key] = text
+    logging.debug(f"Formatted {len(queries)} queries ({len(pending)} not cached)")
+    return [results[key] for key in keys]
+
+def cache_info():
+    """Return hit/miss counts and the size of the memoization cache."""
+    return {"hits": _cache.hits, "misses": _cache.misses, "entries": len(_cache._entries), "size": _cache.size}
+
+def clear_cache():
+    _cache.clear()
+
+def set_cache_size(size):
+    """Change how many formatted queries and fingerprints are kept."""
+    _cache.resize(size)
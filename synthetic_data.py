@@ -0,0 +1,234 @@
+"""
+Script Name: Synthetic Data Generator
+Description: Schema-driven, vectorized test data for load-testing the toolkit (create_excel, write_records,
+             the pipelines). Columns can be ints, floats, booleans, categoricals, dates, datetimes, sequences
+             and strings with a fixed number of distinct values, each with an optional null rate. Every
+             chunk and column draws from its own NumPy SeedSequence stream, so the output for a seed is the
+             same whether it is generated in one process or spread over many.
+
+Usage:
+    python synthetic_data.py schema.json 100000000 --output fixtures/orders --processes 8 --seed 42
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 1000000
+_VOCABULARY_STREAM = 2 ** 32  # spawn key of the string vocabularies, outside the range of chunk indices
+
+# An orders-like schema covering every column type
+DEMO_SCHEMA = {
+    "order_id": {"type": "sequence", "start": 1},
+    "customer": {"type": "string", "cardinality": 50000, "length": 8, "prefix": "C-"},
+    "region": {"type": "category", "values": ["North", "South", "East", "West"], "weights": [0.4, 0.3, 0.2, 0.1]},
+    "order_date": {"type": "date", "start": "2020-01-01", "end": "2025-12-31"},
+    "quantity": {"type": "int", "low": 1, "high": 50, "null_rate": 0.01},
+    "amount": {"type": "float", "distribution": "normal", "mean": 250.0, "std": 80.0, "decimals": 2},
+    "shipped": {"type": "bool", "p": 0.9},
+    "updated_at": {"type": "datetime", "start": "2025-01-01", "end": "2025-12-31"},
+}
+
+def _null_mask(rng, spec, rows):
+    rate = spec.get("null_rate", 0)
+    return rng.random(rows) < rate if rate else None
+
+def _ints(rng, spec, rows, offset):
+    values = rng.integers(spec.get("low", 0), spec.get("high", 1000000), rows, endpoint=True)
+    mask = _null_mask(rng, spec, rows)
+    return values if mask is None else pd.arrays.IntegerArray(values, mask)
+
+def _floats(rng, spec, rows, offset):
+    if spec.get("distribution", "uniform") == "normal":
+        values = rng.normal(spec.get("mean", 0.0), spec.get("std", 1.0), rows)
+    else:
+        values = rng.uniform(spec.get("low", 0.0), spec.get("high", 1.0), rows)
+    if "decimals" in spec:
+        values = np.round(values, spec["decimals"])
+    mask = _null_mask(rng, spec, rows)
+    if mask is not None:
+        values[mask] = np.nan
+    return values
+
+def _bools(rng, spec, rows, offset):
+    values = rng.random(rows) < spec.get("p", 0.5)
+    mask = _null_mask(rng, spec, rows)
+    return values if mask is None else pd.arrays.BooleanArray(values, mask)
+
+def _sequence(rng, spec, rows, offset):
+    start = spec.get("start", 0) + offset * spec.get("step", 1)
+    return np.arange(rows, dtype=np.int64) * spec.get("step", 1) + start
+
+def _categories(rng, spec, rows, offset):
+    values = spec["values"]
+    weights = spec.get("weights")
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float) / np.sum(weights)
+    codes = rng.choice(len(values), rows, p=weights).astype(np.int32)
+    mask = _null_mask(rng, spec, rows)
+    if mask is not None:
+        codes[mask] = -1
+    return pd.Categorical.from_codes(codes, categories=values)
+
+def _timestamps(rng, spec, rows, unit):
+    start = np.datetime64(pd.Timestamp(spec["start"]), unit)
+    end = np.datetime64(pd.Timestamp(spec["end"]), unit)
+    values = start + rng.integers(0, (end - start).astype(np.int64), rows, endpoint=True).astype(f"timedelta64[{unit}]")
+    values = values.astype("datetime64[ns]")
+    mask = _null_mask(rng, spec, rows)
+    if mask is not None:
+        values[mask] = np.datetime64("NaT")
+    return values
+
+def _dates(rng, spec, rows, offset):
+    return _timestamps(rng, spec, rows, "D")
+
+def _datetimes(rng, spec, rows, offset):
+    return _timestamps(rng, spec, rows, "s")
+
+def vocabulary(spec, seed, column_idx):
+    """
+    Return the distinct values of a string column: cardinality unique strings of length letters.
+
+    Each value ends with its index spelled in base 26, so they are unique by construction; the
+    leading letters and the order are random, drawn from the column's own seed stream.
+    """
+    cardinality = spec["cardinality"]
+    digits = max(1, int(np.ceil(np.log(max(cardinality, 2)) / np.log(26))))
+    width = max(spec.get("length", 8), digits)
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(_VOCABULARY_STREAM, column_idx)))
+    letters = rng.integers(ord("a"), ord("z"), (cardinality, width), endpoint=True, dtype=np.uint8)
+    powers = 26 ** np.arange(digits - 1, -1, -1, dtype=np.int64)
+    letters[:, width - digits:] = np.arange(cardinality, dtype=np.int64)[:, None] // powers % 26 + ord("a")
+    words = letters.view(f"S{width}").ravel().astype(str)
+    rng.shuffle(words)
+    prefix = spec.get("prefix", "")
+    return np.char.add(prefix, words).astype(object) if prefix else words.astype(object)
+
+# column type -> function(rng, spec, rows, row offset) returning the column's values
+GENERATORS = {
+    "int": _ints,
+    "float": _floats,
+    "bool": _bools,
+    "sequence": _sequence,
+    "category": _categories,
+    "date": _dates,
+    "datetime": _datetimes,
+}
+
+def _normalize_schema(schema):
+    """Return the schema as a list of (name, spec), validating the column types."""
+    columns = list(schema.items()) if isinstance(schema, dict) else list(schema)
+    for name, spec in columns:
+        if spec["type"] not in GENERATORS and spec["type"] != "string":
+            raise ValueError(f"Unknown type '{spec['type']}' for column {name}")
+    return columns
+
+def generate_chunk(schema, rows, seed=0, chunk_idx=0, offset=0, vocabularies=None):
+    """Generate one chunk of rows; chunk_idx selects its seed streams and offset its sequence values."""
+    columns = _normalize_schema(schema)
+    vocabularies = {} if vocabularies is None else vocabularies
+    data = {}
+    for column_idx, (name, spec) in enumerate(columns):
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_idx, column_idx)))
+        if spec["type"] == "string":
+            words = vocabularies.get(name)
+            if words is None:
+                words = vocabularies[name] = vocabulary(spec, seed, column_idx)
+            codes = rng.integers(0, len(words), rows)
+            mask = _null_mask(rng, spec, rows)
+            if spec.get("as_category"):
+                if mask is not None:
+                    codes[mask] = -1
+                data[name] = pd.Categorical.from_codes(codes, categories=words)
+            else:
+                values = words.take(codes)
+                if mask is not None:
+                    values[mask] = None
+                data[name] = values
+        else:
+            data[name] = GENERATORS[spec["type"]](rng, spec, rows, offset)
+    return pd.DataFrame(data)
+
+def _chunk_bounds(rows, chunksize):
+    return [(idx, start, min(chunksize, rows - start)) for idx, start in enumerate(range(0, rows, chunksize))]
+
+def generate(schema, rows, seed=0, chunksize=DEFAULT_CHUNK_ROWS):
+    """Yield rows of synthetic data as DataFrames of at most chunksize rows."""
+    vocabularies = {}
+    for chunk_idx, offset, size in _chunk_bounds(rows, chunksize):
+        yield generate_chunk(schema, size, seed, chunk_idx, offset, vocabularies)
+
+def generate_frame(schema, rows, seed=0, chunksize=DEFAULT_CHUNK_ROWS):
+    """Return rows of synthetic data as a single DataFrame."""
+    chunks = list(generate(schema, rows, seed, chunksize))
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+def _generate_worker(schema, seed, chunk_idx, offset, size, path, fmt):
+    """Generate one chunk in a worker process and write it to path; returns (path, rows)."""
+    df = generate_chunk(schema, size, seed, chunk_idx, offset)
+    if fmt == "feather":
+        from query_cache import write_feather
+        write_feather(df, path)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path, len(df)
+
+def generate_files(schema, rows, output_dir, seed=0, chunksize=DEFAULT_CHUNK_ROWS, processes=None,
+                   fmt="feather"):
+    """
+    Generate rows in parallel worker processes, one file per chunk in output_dir; return the paths.
+
+    The files hold exactly the chunks generate() would yield for the same seed and chunksize.
+    fmt is "feather", "parquet" or "csv". Callers on Windows must run this under an
+    `if __name__ == "__main__":` guard.
+    """
+    if fmt not in ("feather", "parquet", "csv"):
+        raise ValueError("fmt must be 'feather', 'parquet' or 'csv'")
+    _normalize_schema(schema)
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    bounds = _chunk_bounds(rows, chunksize)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(_generate_worker, schema, seed, chunk_idx, offset, size,
+                            os.path.join(output_dir, f"part-{chunk_idx:05d}.{fmt}"), fmt)
+            for chunk_idx, offset, size in bounds
+        ]
+        paths = [future.result()[0] for future in futures]
+    seconds = time.perf_counter() - start
+    logging.info(f"Generated {rows} rows in {len(paths)} {fmt} files in {seconds:.1f}s "
+                 f"({rows / seconds if seconds else float('inf'):,.0f} rows/s)")
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic data files from a JSON schema.")
+    parser.add_argument("schema", help="JSON file mapping column names to column specs ('demo' for DEMO_SCHEMA)")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--output", required=True, help="directory for the chunk files")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--processes", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--format", default="feather", choices=["feather", "parquet", "csv"])
+    args = parser.parse_args(argv)
+    if args.schema == "demo":
+        schema = DEMO_SCHEMA
+    else:
+        with open(args.schema) as f:
+            schema = json.load(f)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    paths = generate_files(schema, args.rows, args.output, args.seed, args.chunksize, args.processes, args.format)
+    print(f"Wrote {len(paths)} files to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+"""Shared fixtures for the toolkit tests. The modules live at the repository root, not in a package."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
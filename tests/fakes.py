@@ -0,0 +1,149 @@
+"""Fault-injecting fakes for testing retries, circuit breakers and browser session recovery without real servers."""
+
+import time
+import random
+import threading
+from collections import deque
+
+class FaultInjector:
+    """
+    Decides which calls fail, for testing retries against fake or wrapped drivers.
+
+    schedule is consumed in order, one entry per call: an exception (instance or class) to raise,
+    or None to let the call through. After it runs out, calls fail with error at the given rate,
+    drawn from a seeded generator. latency adds a delay to every call.
+    """
+    def __init__(self, schedule=(), rate=0.0, error=ConnectionError, seed=0, latency=0.0):
+        self.schedule = deque(schedule)
+        self.rate = rate
+        self.error = error
+        self.latency = latency
+        self.calls = 0
+        self.injected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def check(self, name="call"):
+        """Raise the next injected fault, if any, for a call of name."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if self.schedule:
+                fault = self.schedule.popleft()
+            else:
+                fault = self.error if self.rate and self._random.random() < self.rate else None
+            if fault is None:
+                return
+            self.injected += 1
+        raise fault(f"Injected fault in {name}") if isinstance(fault, type) else fault
+
+class FaultyProxy:
+    """Wrap an object (a DB-API connection or cursor, a WebDriver) so calls to methods first go through a FaultInjector."""
+    def __init__(self, target, injector, methods=("cursor", "execute", "get", "execute_script", "find_element")):
+        self._target = target
+        self._injector = injector
+        self._methods = set(methods)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name not in self._methods or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self._injector.check(name)
+            result = attribute(*args, **kwargs)
+            # Cursors come back wrapped too, so faults can be injected into execute
+            return FaultyProxy(result, self._injector, self._methods) if name == "cursor" else result
+        return call
+
+def flaky_connect(connect, injector, methods=("cursor", "execute")):
+    """
+    Wrap a connect function so that connecting and the given connection methods can fail.
+
+    Register the result with db_pool.register_server to test fetch_records against a flaky
+    stand-in, e.g. register_server("Flaky", flaky_connect(lambda: sqlite3.connect(path), FaultInjector(rate=0.2))).
+    """
+    def connect_with_faults():
+        injector.check("connect")
+        return FaultyProxy(connect(), injector, methods)
+    return connect_with_faults
+
+class FakeElement:
+    """Element returned by FakeDriver.find_element."""
+    def __init__(self, text=""):
+        self.text = text
+        self.clicks = 0
+        self.value = ""
+
+    def click(self):
+        self.clicks += 1
+
+    def clear(self):
+        self.value = ""
+
+    def send_keys(self, text):
+        self.value += text
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+class FakeDriver:
+    """
+    In-memory stand-in for a Selenium WebDriver, to test WebDriverManager code without a browser.
+
+    pages maps URLs to page titles; elements maps (locator_type, locator_value) to FakeElements.
+    Every navigation, script and element lookup goes through injector first. Assign it to
+    manager.driver (and manager.init_driver, to let session restarts create a new one).
+    """
+    def __init__(self, pages=None, elements=None, injector=None, script_results=None):
+        self.pages = pages or {}
+        self.elements = elements or {}
+        self.injector = injector or FaultInjector()
+        self.script_results = script_results or {}
+        self.current_url = None
+        self.title = ""
+        self.timeouts = {}
+        self.quit_called = False
+
+    def get(self, url):
+        self.injector.check("get")
+        self.current_url = url
+        self.title = self.pages.get(url, "")
+
+    def find_element(self, by, value):
+        self.injector.check("find_element")
+        element = self.elements.get((by, value))
+        if element is None:
+            try:
+                from selenium.common.exceptions import NoSuchElementException  # WebDriverWait keeps polling
+            except ImportError:
+                raise LookupError(f"No element {by}={value}")
+            raise NoSuchElementException(f"No element {by}={value}")
+        return element
+
+    def find_elements(self, by, value):
+        element = self.elements.get((by, value))
+        return [] if element is None else [element]
+
+    def execute_script(self, script, *args):
+        self.injector.check("execute_script")
+        return self.script_results.get(script)
+
+    def execute_async_script(self, script, *args):
+        return self.execute_script(script, *args)
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def set_page_load_timeout(self, seconds):
+        self.timeouts["page_load"] = seconds
+
+    def set_script_timeout(self, seconds):
+        self.timeouts["script"] = seconds
+
+    def quit(self):
+        self.quit_called = True
@@ -0,0 +1,126 @@
+"""WebDriverPool against a local static server, with fake browsers (no real browser is needed)."""
+
+import re
+import threading
+from urllib.request import urlopen
+
+import pytest
+
+from driver_pool import WebDriverPool, serve_directory
+
+PAGES = 6
+
+class FakeBrowser:
+    """Driver stand-in that loads pages over HTTP with urllib and can be made to crash."""
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.title = ""
+        self._url = None
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise ConnectionError("browser crashed")
+        return self._url
+
+    def get(self, url):
+        if not self.alive:
+            raise ConnectionError("browser crashed")
+        html = urlopen(url, timeout=5).read().decode()
+        self._url = url
+        self.title = re.search(r"<title>(.*)</title>", html).group(1)
+
+    def quit(self):
+        self.quit_called = True
+
+class FakeManager:
+    """The parts of WebDriverManager the pool uses."""
+    def __init__(self):
+        self.driver = FakeBrowser()
+
+    def open_url(self, url):
+        self.driver.get(url)
+
+    def close_driver(self):
+        self.driver.quit()
+
+class CountingFactory:
+    def __init__(self):
+        self.managers = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        manager = FakeManager()
+        with self._lock:
+            self.managers.append(manager)
+        return manager
+
+@pytest.fixture
+def site(tmp_path):
+    for idx in range(PAGES):
+        (tmp_path / f"page{idx}.html").write_text(f"<html><head><title>Page {idx}</title></head></html>")
+    with serve_directory(str(tmp_path)) as base_url:
+        yield base_url
+
+@pytest.fixture
+def factory():
+    return CountingFactory()
+
+def test_map_opens_every_page_in_order(site, factory):
+    urls = [f"{site}/page{idx % PAGES}.html" for idx in range(20)]
+    with WebDriverPool(size=3, factory=factory) as pool:
+        results = pool.map(lambda manager: manager.driver.title, urls)
+        stats = pool.stats()
+    assert [title for _, title, _ in results] == [f"Page {idx % PAGES}" for idx in range(20)]
+    assert all(error is None for _, _, error in results)
+    assert len(factory.managers) == 3
+    assert sum(row["pages"] for row in stats) == 20
+
+def test_session_is_returned_for_reuse(site, factory):
+    with WebDriverPool(size=1, factory=factory) as pool:
+        with pool.session() as first:
+            first.open_url(f"{site}/page0.html")
+        with pool.session() as second:
+            assert second is first
+    assert len(factory.managers) == 1
+
+def test_borrowing_past_pool_size_times_out(factory):
+    with WebDriverPool(size=2, factory=factory) as pool:
+        with pool.session(), pool.session():
+            with pytest.raises(TimeoutError):
+                with pool.session(timeout=0.1):
+                    pass
+        with pool.session(timeout=0.1):  # both are back
+            pass
+
+def test_session_recycled_after_max_pages(site, factory):
+    with WebDriverPool(size=1, max_pages=3, factory=factory) as pool:
+        for idx in range(7):
+            with pool.session() as manager:
+                manager.open_url(f"{site}/page{idx % PAGES}.html")
+        assert pool.stats()[0]["restarts"] == 2
+    assert len(factory.managers) == 3
+    assert all(manager.driver.quit_called for manager in factory.managers)
+
+def test_broken_driver_is_replaced(site, factory):
+    with WebDriverPool(size=1, factory=factory) as pool:
+        with pytest.raises(ConnectionError):
+            with pool.session() as manager:
+                manager.driver.alive = False
+                manager.open_url(f"{site}/page0.html")
+        with pool.session() as replacement:
+            replacement.open_url(f"{site}/page1.html")
+            assert replacement is not manager
+            assert replacement.driver.title == "Page 1"
+        stats = pool.stats()[0]
+    assert manager.driver.quit_called
+    assert (stats["errors"], stats["restarts"]) == (1, 1)
+
+def test_closed_pool_rejects_borrowing(factory):
+    pool = WebDriverPool(size=2, factory=factory).start()
+    pool.close()
+    assert all(manager.driver.quit_called for manager in factory.managers)
+    with pytest.raises(RuntimeError):
+        with pool.session():
+            pass
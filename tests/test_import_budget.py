@@ -0,0 +1,26 @@
+"""Importing automation_toolkit must stay fast and must not pull in the heavy subsystems."""
+
+import subprocess
+import sys
+
+from conftest import ROOT
+from benchmarks import IMPORT_BUDGET_SECONDS
+
+HEAVY = ("pandas", "numpy", "selenium", "sqlalchemy")
+ATTEMPTS = 3  # best of, to ride out a cold disk cache or a busy machine
+
+def _import_in_fresh_interpreter():
+    code = ("import sys, time; start = time.perf_counter(); import automation_toolkit; "
+            "print(time.perf_counter() - start); "
+            f"print(','.join(name for name in {HEAVY!r} if name in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=ROOT).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name]
+
+def test_import_loads_no_heavy_modules():
+    _, heavy = _import_in_fresh_interpreter()
+    assert heavy == []
+
+def test_import_is_within_budget():
+    seconds = min(_import_in_fresh_interpreter()[0] for _ in range(ATTEMPTS))
+    assert seconds < IMPORT_BUDGET_SECONDS, f"import took {seconds * 1000:.0f} ms"
@@ -0,0 +1,99 @@
+"""fetch_incremental against a temporary SQLite database standing in for a server."""
+
+import os
+import sqlite3
+
+import pytest
+
+import db_pool
+import incremental
+import resilience
+from incremental import STATE_FILE, WatermarkStore, dataset_path, fetch_incremental
+
+SERVER = "IncrementalTest"
+QUERY = "SELECT id, name, version FROM items"
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    path = str(tmp_path / "source.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, version INTEGER)")
+        conn.executemany("INSERT INTO items VALUES (?, ?, ?)", [(1, "a", 1), (2, "b", 2), (3, "c", 3)])
+    db_pool.register_server(SERVER, lambda: sqlite3.connect(path, check_same_thread=False))
+    monkeypatch.setattr(incremental, "DB_POLICY", resilience.NO_RETRY)
+    yield path
+    db_pool.close_pool(SERVER)
+    db_pool.SERVERS.pop(SERVER, None)
+    resilience.reset_breakers()
+
+@pytest.fixture
+def state_dir(tmp_path):
+    return str(tmp_path / "state")
+
+def _execute(path, sql, params=()):
+    with sqlite3.connect(path) as conn:
+        conn.execute(sql, params)
+
+def _refresh(state_dir, **kwargs):
+    return fetch_incremental("items", QUERY, SERVER, "version", "id", state_dir=state_dir, **kwargs)
+
+def _watermark(state_dir):
+    store = WatermarkStore(os.path.join(state_dir, STATE_FILE))
+    try:
+        return store.get("items")
+    finally:
+        store.close()
+
+def _rows(df):
+    return sorted(map(tuple, df[["id", "name", "version"]].itertuples(index=False)))
+
+def test_first_call_is_a_full_load(source, state_dir):
+    df = _refresh(state_dir)
+    assert _rows(df) == [(1, "a", 1), (2, "b", 2), (3, "c", 3)]
+    state = _watermark(state_dir)
+    assert (state["watermark"], state["rows"]) == (3, 3)
+    assert os.path.exists(dataset_path("items", state_dir))
+
+def test_refresh_fetches_only_rows_past_the_watermark(source, state_dir, monkeypatch):
+    _refresh(state_dir)
+    _execute(source, "INSERT INTO items VALUES (4, 'd', 4)")
+    seen = []
+    fetch_delta = incremental._fetch_delta
+    def spy(query, server_type, watermark_column, watermark):
+        delta = fetch_delta(query, server_type, watermark_column, watermark)
+        seen.append((watermark, _rows(delta)))
+        return delta
+    monkeypatch.setattr(incremental, "_fetch_delta", spy)
+    df = _refresh(state_dir)
+    assert seen == [(3, [(4, "d", 4)])]
+    assert _rows(df) == [(1, "a", 1), (2, "b", 2), (3, "c", 3), (4, "d", 4)]
+    assert _watermark(state_dir)["watermark"] == 4
+
+def test_changed_keys_are_replaced_not_duplicated(source, state_dir):
+    _refresh(state_dir)
+    _execute(source, "UPDATE items SET name = 'b2', version = 5 WHERE id = 2")
+    _execute(source, "INSERT INTO items VALUES (6, 'f', 6)")
+    df = _refresh(state_dir)
+    assert _rows(df) == [(1, "a", 1), (2, "b2", 5), (3, "c", 3), (6, "f", 6)]
+    state = _watermark(state_dir)
+    assert (state["watermark"], state["rows"]) == (6, 4)
+
+def test_no_new_rows_keeps_the_dataset(source, state_dir):
+    first = _refresh(state_dir)
+    assert _rows(_refresh(state_dir)) == _rows(first)
+    assert _watermark(state_dir)["watermark"] == 3
+
+def test_failed_fetch_leaves_watermark_and_dataset_unchanged(source, state_dir):
+    _refresh(state_dir)
+    before = _watermark(state_dir)
+    path = dataset_path("items", state_dir)
+    mtime = os.path.getmtime(path)
+    _execute(source, "ALTER TABLE items RENAME TO items_old")
+    with pytest.raises(Exception, match="no such table"):
+        _refresh(state_dir)
+    after = _watermark(state_dir)
+    assert (after["watermark"], after["rows"], after["updated"]) == (before["watermark"], before["rows"], before["updated"])
+    assert os.path.getmtime(path) == mtime
+    _execute(source, "ALTER TABLE items_old RENAME TO items")
+    _execute(source, "INSERT INTO items VALUES (4, 'd', 4)")
+    assert len(_refresh(state_dir)) == 4
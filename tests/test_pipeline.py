@@ -0,0 +1,42 @@
+"""Pipeline checkpoints: resume after a failed run, fresh data after a successful one."""
+
+import pandas as pd
+
+from pipeline import Pipeline
+
+def build(checkpoint_dir, calls, fail=None):
+    """A fetch -> transform pipeline that counts calls per stage; fail names a stage that raises."""
+    pipeline = Pipeline("checkpoints", checkpoint_dir=str(checkpoint_dir))
+
+    @pipeline.stage()
+    def fetch():
+        calls.append("fetch")
+        return pd.DataFrame({"x": [len(calls)]})
+
+    @pipeline.stage(inputs=["fetch"])
+    def transform(df):
+        calls.append("transform")
+        if fail == "transform":
+            raise RuntimeError("transform failed")
+        return df.assign(y=df["x"] * 2)
+    return pipeline
+
+def statuses(results):
+    return {result.name: result.status for result in results}
+
+def test_successful_runs_fetch_fresh_data(tmp_path):
+    calls = []
+    first = build(tmp_path, calls).run()
+    second = build(tmp_path, calls).run()
+    assert statuses(first) == statuses(second) == {"fetch": "done", "transform": "done"}
+    assert calls.count("fetch") == 2
+    assert list(tmp_path.rglob("_SUCCESS.json")) == []
+
+def test_rerun_after_failure_resumes_finished_stages(tmp_path):
+    calls = []
+    failed = build(tmp_path, calls, fail="transform").run()
+    assert statuses(failed) == {"fetch": "done", "transform": "failed"}
+    resumed = build(tmp_path, calls).run()
+    assert statuses(resumed) == {"fetch": "resumed", "transform": "done"}
+    assert calls.count("fetch") == 1
+    assert list(tmp_path.rglob("_SUCCESS.json")) == []
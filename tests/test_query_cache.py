@@ -0,0 +1,102 @@
+"""QueryCache keys and the on-disk index shared between cache instances."""
+
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import db_pool
+from automation_toolkit import fetch_records
+from query_cache import INDEX_FILE, QueryCache, cache_key
+
+@pytest.mark.parametrize("first, second", [
+    ("SELECT * FROM t WHERE x = 'a  b'", "SELECT * FROM t WHERE x = 'a b'"),
+    ("SELECT * FROM t -- note\nWHERE y = 2", "SELECT * FROM t -- note WHERE y = 2"),
+    ('SELECT "a  b" FROM t', 'SELECT "a b" FROM t'),
+])
+def test_different_queries_get_different_entries(first, second):
+    assert cache_key(first, "SSMS") != cache_key(second, "SSMS")
+    cache = QueryCache(cache_dir=None)
+    cache.put(first, "SSMS", pd.DataFrame({"x": [1]}))
+    assert cache.get(second, "SSMS") is None
+    assert cache.get(first, "SSMS")["x"].tolist() == [1]
+
+def test_formatting_only_differences_share_an_entry():
+    cache = QueryCache(cache_dir=None)
+    cache.put("SELECT a,  b\nFROM t -- note\n  WHERE x = 'a  b'", "SSMS", pd.DataFrame({"x": [1]}))
+    assert cache.get("  SELECT a, b FROM t -- note\nWHERE x = 'a  b'\n", "SSMS") is not None
+
+def frame(value):
+    return pd.DataFrame({"x": [value] * 10})
+
+def test_instances_sharing_a_directory_keep_each_others_entries(tmp_path):
+    first, second = QueryCache(str(tmp_path)), QueryCache(str(tmp_path))
+    first.put("SELECT 1", "SSMS", frame(1))
+    second.put("SELECT 2", "SSMS", frame(2))
+    third = QueryCache(str(tmp_path))
+    assert third.get("SELECT 1", "SSMS")["x"][0] == 1
+    assert third.get("SELECT 2", "SSMS")["x"][0] == 2
+    assert second.get("SELECT 1", "SSMS")["x"][0] == 1  # stored by first after second loaded the index
+    assert len(list(tmp_path.glob("*.feather"))) == 2
+
+def test_concurrent_writers_lose_no_entries(tmp_path):
+    caches = [QueryCache(str(tmp_path)) for _ in range(4)]
+
+    def fill(idx):
+        for n in range(10):
+            caches[idx].put(f"SELECT {idx}, {n}", "SSMS", frame(n))
+    threads = [threading.Thread(target=fill, args=(idx,)) for idx in range(len(caches))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reader = QueryCache(str(tmp_path))
+    assert len(reader._index) == 40
+    assert len(list(tmp_path.glob("*.feather"))) == 40
+    assert list(tmp_path.glob("*.tmp")) == []
+
+def test_disk_hits_do_not_rewrite_the_index(tmp_path):
+    QueryCache(str(tmp_path)).put("SELECT 1", "SSMS", frame(1))
+    index = tmp_path / INDEX_FILE
+    before = (index.read_text(), index.stat().st_mtime_ns)
+    cache = QueryCache(str(tmp_path))
+    for _ in range(3):
+        assert cache.get("SELECT 1", "SSMS") is not None
+    assert (index.read_text(), index.stat().st_mtime_ns) == before
+
+def test_disk_tier_evicts_least_recently_read(tmp_path):
+    writer = QueryCache(str(tmp_path))
+    for n in range(3):
+        writer.put(f"SELECT {n}", "SSMS", frame(n))
+        time.sleep(0.02)
+    reader = QueryCache(str(tmp_path))
+    reader.get("SELECT 0", "SSMS")  # now the most recently used
+    entry_bytes = max(entry["nbytes"] for entry in reader._index.values())
+    limited = QueryCache(str(tmp_path), max_disk_bytes=3 * entry_bytes, max_memory_bytes=0)
+    limited.put("SELECT 3", "SSMS", frame(3))
+    assert QueryCache(str(tmp_path), max_memory_bytes=0).get("SELECT 1", "SSMS") is None
+    assert QueryCache(str(tmp_path), max_memory_bytes=0).get("SELECT 0", "SSMS") is not None
+
+@pytest.fixture
+def sqlite_server(tmp_path):
+    path = str(tmp_path / "source.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (id INTEGER, region TEXT)")
+        conn.executemany("INSERT INTO t VALUES (?, ?)", [(idx, f"R{idx % 3}") for idx in range(100)])
+    db_pool.register_server("CacheTest", lambda: sqlite3.connect(path, check_same_thread=False))
+    yield "CacheTest"
+    db_pool.close_pool("CacheTest")
+    db_pool.SERVERS.pop("CacheTest", None)
+
+def test_optimize_applies_on_cache_hits_and_is_not_cached(sqlite_server, tmp_path):
+    query = "SELECT id, region FROM t"
+    cache = QueryCache(str(tmp_path / "cache"))
+    raw = fetch_records(query, sqlite_server)
+    optimized = fetch_records(query, sqlite_server, cache=cache, optimize=True)
+    plain = fetch_records(query, sqlite_server, cache=cache)
+    optimized_hit = fetch_records(query, sqlite_server, cache=cache, optimize=True)
+    assert plain.dtypes.to_dict() == raw.dtypes.to_dict()
+    assert optimized_hit.dtypes.to_dict() == optimized.dtypes.to_dict()
+    assert optimized_hit["region"].dtype == "category"
@@ -0,0 +1,193 @@
+"""Retries, circuit breakers, deadlines and browser session recovery, against injected faults."""
+
+import sqlite3
+import time
+
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, StaleElementReferenceException
+
+import db_pool
+import resilience
+from automation_toolkit import WebDriverManager, fetch_records
+from instrumentation import MetricsRegistry
+from resilience import (CircuitOpenError, DeadlineExceeded, RetryPolicy, NO_RETRY, breaker_states,
+                        configure_breaker, deadline, retry_call, retry_stream)
+
+from fakes import FakeDriver, FakeElement, FaultInjector, flaky_connect
+
+FAST = RetryPolicy(attempts=4, base_delay=0.01, max_delay=0.01)
+SERVER = "FlakySQLite"
+# pandas warns about DB-API connections that are not sqlite3.Connection, which the FaultyProxy is not
+pytestmark = pytest.mark.filterwarnings("ignore:pandas only supports SQLAlchemy")
+
+@pytest.fixture(autouse=True)
+def clean_breakers():
+    resilience.reset_breakers()
+    yield
+    resilience.reset_breakers()
+
+@pytest.fixture
+def flaky_server(tmp_path):
+    """Register a SQLite stand-in whose connects go through the returned injector's schedule."""
+    path = str(tmp_path / "flaky.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (id INTEGER)")
+        conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,), (3,)])
+
+    def register(schedule):
+        injector = FaultInjector(schedule)
+        connect = flaky_connect(lambda: sqlite3.connect(path, check_same_thread=False), injector, methods=())
+        db_pool.register_server(SERVER, connect)
+        return injector
+    yield register
+    db_pool.close_pool(SERVER)
+    db_pool.SERVERS.pop(SERVER, None)
+
+def failing(error=ConnectionError, calls=None):
+    def func():
+        if calls is not None:
+            calls.append(time.monotonic())
+        raise error("connection reset by peer")
+    return func
+
+def test_fetch_records_retries_a_flaky_connect(flaky_server):
+    injector = flaky_server([ConnectionError, ConnectionError])
+    registry = resilience.REGISTRY
+    before = registry.snapshot().get(f"retry.db.{SERVER}", {}).get("error_count", 0)
+    df = fetch_records("SELECT id FROM t ORDER BY id", SERVER, retry_policy=FAST)
+    assert df["id"].tolist() == [1, 2, 3]
+    assert (injector.calls, injector.injected) == (3, 2)
+    assert registry.snapshot()[f"retry.db.{SERVER}"]["error_count"] - before == 2
+    assert breaker_states()[f"db.{SERVER}"] == {"state": "closed", "failures": 0}
+
+def test_fetch_records_gives_up_after_the_policy_attempts(flaky_server):
+    injector = flaky_server([ConnectionError] * 5)
+    with pytest.raises(ConnectionError):
+        fetch_records("SELECT id FROM t", SERVER, retry_policy=RetryPolicy(attempts=2, base_delay=0.01))
+    assert injector.calls == 2
+
+def test_permanent_errors_are_not_retried(flaky_server):
+    injector = flaky_server([])
+    with pytest.raises(Exception, match="no such table"):
+        fetch_records("SELECT * FROM missing", SERVER, retry_policy=FAST)
+    assert injector.calls == 1
+
+def test_breaker_opens_after_threshold_and_probes_after_cool_down():
+    target = "test.breaker"
+    configure_breaker(target, failure_threshold=3, reset_timeout=0.2)
+    calls = []
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            retry_call(failing(calls=calls), target, NO_RETRY, registry=MetricsRegistry())
+    assert breaker_states()[target] == {"state": "open", "failures": 3}
+
+    registry = MetricsRegistry()
+    with pytest.raises(CircuitOpenError):
+        retry_call(failing(calls=calls), target, NO_RETRY, registry=registry)
+    assert len(calls) == 3  # rejected without calling the target
+    assert registry.snapshot()[f"circuit_open.{target}"]["error_count"] == 1
+
+    time.sleep(0.25)
+    with pytest.raises(ConnectionError):  # the half-open probe fails and reopens the circuit
+        retry_call(failing(calls=calls), target, NO_RETRY, registry=MetricsRegistry())
+    assert len(calls) == 4
+    assert breaker_states()[target]["state"] == "open"
+    with pytest.raises(CircuitOpenError):
+        retry_call(lambda: "ok", target, NO_RETRY, registry=MetricsRegistry())
+
+    time.sleep(0.25)
+    assert retry_call(lambda: "ok", target, NO_RETRY, registry=MetricsRegistry()) == "ok"
+    assert breaker_states()[target] == {"state": "closed", "failures": 0}
+
+def test_deadline_stops_retry_call():
+    calls = []
+    configure_breaker("test.deadline", failure_threshold=1000)
+    policy = RetryPolicy(attempts=100, base_delay=0.05, max_delay=0.05, jitter=False)
+    start = time.monotonic()
+    with deadline(0.3):
+        with pytest.raises(ConnectionError):
+            retry_call(failing(calls=calls), "test.deadline", policy, registry=MetricsRegistry())
+    assert time.monotonic() - start < 0.5
+    assert 2 <= len(calls) < 10
+
+def test_expired_deadline_does_not_call_the_target():
+    calls = []
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            retry_call(failing(calls=calls), "test.expired", FAST, registry=MetricsRegistry())
+    assert calls == []
+
+def test_deadline_stops_retry_stream():
+    opens = []
+
+    def open_stream():
+        opens.append(time.monotonic())
+        raise ConnectionError("connection reset by peer")
+        yield  # a generator function, like stream_records
+
+    configure_breaker("test.stream", failure_threshold=1000)
+    policy = RetryPolicy(attempts=100, base_delay=0.05, max_delay=0.05, jitter=False)
+    start = time.monotonic()
+    with deadline(0.3):
+        with pytest.raises(ConnectionError):
+            list(retry_stream(open_stream, "test.stream", policy))
+    assert time.monotonic() - start < 0.5
+    assert 2 <= len(opens) < 10
+
+def test_retry_stream_does_not_restart_after_the_first_chunk():
+    opens = []
+
+    def open_stream():
+        opens.append(1)
+        yield "chunk 1"
+        raise ConnectionError("connection reset by peer")
+
+    chunks = retry_stream(open_stream, "test.stream_partial", FAST)
+    assert next(chunks) == "chunk 1"
+    with pytest.raises(ConnectionError):
+        next(chunks)
+    assert len(opens) == 1
+
+URL = "http://example.test/form"
+
+@pytest.fixture
+def browser():
+    """A WebDriverManager on FakeDrivers; restarts create a new FakeDriver, listed in drivers."""
+    manager = WebDriverManager(browser="chrome", retry_policy=FAST)
+    drivers = []
+
+    def init_driver(schedule=()):
+        driver = FakeDriver(pages={URL: "Form"}, elements={("id", "name"): FakeElement("Ada")},
+                            injector=FaultInjector(schedule))
+        drivers.append(driver)
+        manager.driver = driver
+        return driver
+    manager.init_driver = init_driver
+    return manager, drivers
+
+def test_open_url_restarts_an_invalid_session(browser):
+    manager, drivers = browser
+    manager.init_driver([InvalidSessionIdException("invalid session id")])
+    manager.open_url(URL)
+    assert len(drivers) == 2
+    assert drivers[0].quit_called
+    assert manager.driver is drivers[1]
+    assert (manager.driver.current_url, manager.driver.title) == (URL, "Form")
+
+def test_stale_element_is_retried_on_the_same_session(browser):
+    manager, drivers = browser
+    manager.init_driver([None, StaleElementReferenceException("stale element reference")])
+    manager.open_url(URL)
+    assert manager.get_text("id", "name") == "Ada"
+    assert len(drivers) == 1
+    assert drivers[0].injector.injected == 1
+
+def test_lost_session_in_element_call_reopens_the_last_url(browser):
+    manager, drivers = browser
+    manager.init_driver([None, InvalidSessionIdException("invalid session id")])
+    manager.open_url(URL)
+    manager.enter_text("id", "name", "Grace")
+    assert len(drivers) == 2
+    assert drivers[1].current_url == URL
+    element = drivers[1].elements[("id", "name")]
+    assert element.value == "Grace"
@@ -0,0 +1,22 @@
+"""unpivot_dataframe key parsing from column names."""
+
+import pandas as pd
+import pytest
+
+from useful_snippets import unpivot_dataframe
+
+@pytest.mark.parametrize("engine", ["pandas", "numpy"])
+def test_names_converting_to_the_same_number_share_a_category(engine):
+    df = pd.DataFrame({"ID": [1, 2], "T_01": [10, 20], "T_1": [30, 40], "T_2": [50, 60]})
+    long_df = unpivot_dataframe(df, ["ID"], None, engine=engine, name_pattern=r"T_(?P<period>\d+)")
+    assert list(long_df["period"].cat.categories) == [1, 2]
+    assert long_df["period"].tolist() == [1, 1, 1, 1, 2, 2]
+    assert long_df["value"].tolist() == [10, 20, 30, 40, 50, 60]
+
+@pytest.mark.parametrize("engine", ["pandas", "numpy"])
+def test_non_numeric_keys_keep_string_categories(engine):
+    df = pd.DataFrame({"ID": [1], "A_Jan": [1], "B_Jan": [2], "A_Feb": [3]})
+    long_df = unpivot_dataframe(df, ["ID"], None, engine=engine,
+                                name_pattern=r"(?P<product>\w)_(?P<month>\w+)")
+    assert long_df["product"].tolist() == ["A", "B", "A"]
+    assert long_df["month"].tolist() == ["Jan", "Jan", "Feb"]
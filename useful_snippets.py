@@ -1,26 +1,101 @@
-# Read Binary Excel File
+import re
+
+import numpy as np
 import pandas as pd
-import pyxlsb
-df =  pd.read_excel('Customers.xlsb', engine='pyxlsb', sheet_name = 'Sheet1')
-df.shape
+from excel_reader import read_excel_fast
+
+# Read Binary Excel File
+def read_customers(path='Customers.xlsb', usecols=None):
+    """
+    Reads the Customers sheet from a binary Excel workbook.
+
+    The first read streams the workbook and writes a Feather sidecar next
+    to it; later reads memory-map the sidecar instead of parsing the xlsb.
+    For very large workbooks use read_excel_chunks to process it in chunks.
+    """
+    return read_excel_fast(path, sheet_name='Sheet1', usecols=usecols, cache=True)
 
 
 
 # Read data from MySQL database
-import mysql.connector
-import pandas as pd
-connection  = mysql.connector.connect(user='public',  password='text@321', host='localhost', database='test_db')
-query = "SELECT * FROM dbn.table"
-df = pd.read_sql_query(query, connection)
+def read_mysql_table(query="SELECT * FROM dbn.table"):
+    """Reads the result of a query from the local MySQL test database."""
+    import mysql.connector
+    connection  = mysql.connector.connect(user='public',  password='text@321', host='localhost', database='test_db')
+    return pd.read_sql_query(query, connection)
 
-import pandas as pd
 
-def unpivot_dataframe(df, id_vars, value_vars, var_name='variable', value_name='value'):
+def _parse_column_names(value_vars, name_pattern):
+    """
+    Splits the unpivoted column names into typed key columns.
+
+    Each named group of `name_pattern` becomes one key. Only the
+    len(value_vars) distinct names are parsed; the result maps every key to
+    its per-name categories and integer codes, ready to be broadcast with
+    np.repeat. Keys whose values are all numeric get numeric categories;
+    names that convert to the same number (T_01 and T_1) share a category.
+    """
+    regex = re.compile(name_pattern)
+    matches = [regex.fullmatch(str(name)) for name in value_vars]
+    unmatched = [name for name, match in zip(value_vars, matches) if match is None]
+    if unmatched:
+        raise ValueError(f"Column names do not match name_pattern: {unmatched[:5]}")
+    keys = {}
+    for key in regex.groupindex:
+        codes, categories = pd.factorize(pd.Series([match.group(key) for match in matches]))
+        numeric = pd.to_numeric(pd.Series(categories), errors='coerce')
+        if numeric.notna().all():
+            remap, categories = pd.factorize(numeric)
+            codes = remap[codes]
+        keys[key] = (codes, categories)
+    return keys
+
+def _unpivot_numpy(df, id_vars, value_vars, var_name, value_name, keys):
+    """
+    NumPy-backed unpivot of one wide block.
+
+    The values are gathered with a single column-major ravel (the same
+    variable-major order as pd.melt), the id columns with one positional
+    take, and the variable and key columns are categoricals built from
+    repeated integer codes instead of repeated strings.
+    """
+    n_rows, n_vars = len(df), len(value_vars)
+    long_df = df[id_vars].take(np.tile(np.arange(n_rows), n_vars)).reset_index(drop=True)
+    var_codes = np.repeat(np.arange(n_vars, dtype=np.int32), n_rows)
+    long_df[var_name] = pd.Categorical.from_codes(var_codes, categories=pd.Index(value_vars))
+    for key, (codes, categories) in keys.items():
+        long_df[key] = pd.Categorical.from_codes(codes[var_codes], categories=categories)
+    long_df[value_name] = df[value_vars].to_numpy().ravel(order='F')
+    return long_df
+
+def _unpivot_block(df, id_vars, value_vars, var_name, value_name, engine, keys):
+    """Unpivots one wide block with the chosen engine."""
+    if engine == 'numpy':
+        return _unpivot_numpy(df, id_vars, value_vars, var_name, value_name, keys)
+    long_df = pd.melt(df,
+                      id_vars=id_vars,
+                      value_vars=value_vars,
+                      var_name=var_name,
+                      value_name=value_name)
+    if keys:
+        var_codes = pd.Categorical(long_df[var_name], categories=value_vars).codes
+        for key, (codes, categories) in keys.items():
+            long_df.insert(len(long_df.columns) - 1, key,
+                           pd.Categorical.from_codes(codes[var_codes], categories=categories))
+    return long_df
+
+def _as_chunks(result):
+    """Wraps a single DataFrame result so it can be iterated like a generator of chunks."""
+    return [result] if isinstance(result, pd.DataFrame) else result
+
+def unpivot_dataframe(df, id_vars, value_vars, var_name='variable', value_name='value',
+                      engine='pandas', chunksize=None, name_pattern=None):
     """
     Unpivots a Pandas DataFrame from wide format to long format.
 
     Args:
-        df (pd.DataFrame): The input DataFrame in wide format.
+        df (pd.DataFrame): The input DataFrame in wide format, or an iterable
+                           of DataFrame chunks.
         id_vars (list): List of column names to use as identifier variables.
         value_vars (list): List of column names to unpivot. If None, all
                            columns not in `id_vars` will be used.
@@ -28,19 +103,47 @@ def unpivot_dataframe(df, id_vars, value_vars, var_name='variable', value_name='
                                    Defaults to 'variable'.
         value_name (str, optional): Name to use for the 'value' column.
                                      Defaults to 'value'.
+        engine (str, optional): 'pandas' uses pd.melt. 'numpy' builds the
+                                 long frame with a single ravel of the
+                                 values and a categorical variable column,
+                                 which keeps peak memory close to the
+                                 output size on very wide frames.
+                                 Defaults to 'pandas'.
+        chunksize (int, optional): If given, a generator is returned that
+                                   yields the long format for blocks of
+                                   `chunksize` input rows. Defaults to None.
+        name_pattern (str, optional): Regular expression with named groups,
+                                      e.g. r'(?P<product>.+)_(?P<month>[^_]+)'.
+                                      Each group becomes a categorical key
+                                      column parsed from the unpivoted
+                                      column names. Defaults to None.
 
     Returns:
-        pd.DataFrame: The unpivoted DataFrame in long format.
+        pd.DataFrame: The unpivoted DataFrame in long format. If `df` is an
+                      iterable of DataFrame chunks (e.g. from
+                      fetch_records(..., chunksize=...)) or `chunksize` is
+                      given, a generator of unpivoted chunks is returned
+                      instead.
     """
+    if engine not in ('pandas', 'numpy'):
+        raise ValueError("engine must be 'pandas' or 'numpy'")
+    if not isinstance(df, pd.DataFrame):
+        return (long_chunk
+                for chunk in df
+                for long_chunk in _as_chunks(unpivot_dataframe(
+                    chunk, id_vars, value_vars, var_name, value_name,
+                    engine, chunksize, name_pattern)))
+    id_vars = list(id_vars or [])
     if value_vars is None:
         value_vars = [col for col in df.columns if col not in id_vars]
+    value_vars = list(value_vars)
+    keys = _parse_column_names(value_vars, name_pattern) if name_pattern else {}
 
-    unpivoted_df = pd.melt(df,
-                            id_vars=id_vars,
-                            value_vars=value_vars,
-                            var_name=var_name,
-                            value_name=value_name)
-    return unpivoted_df
+    if chunksize:
+        return (_unpivot_block(df.iloc[start:start + chunksize], id_vars, value_vars,
+                               var_name, value_name, engine, keys)
+                for start in range(0, len(df), chunksize))
+    return _unpivot_block(df, id_vars, value_vars, var_name, value_name, engine, keys)
 
 if __name__ == '__main__':
     # Example DataFrame in wide format
@@ -83,3 +186,15 @@ if __name__ == '__main__':
                                    value_name='Value')
     print("\nUnpivoted Long DataFrame 2:")
     print(df_long_2)
+
+    # NumPy engine, splitting 'Product_A_Jan' into product and month keys
+    df_long_3 = unpivot_dataframe(df_wide,
+                                   id_columns,
+                                   value_columns,
+                                   var_name='Product_Month',
+                                   value_name='Sales',
+                                   engine='numpy',
+                                   name_pattern=r'(?P<Product>.+)_(?P<Month>[^_]+)')
+    print("\nUnpivoted Long DataFrame 3 (numpy engine with parsed keys):")
+    print(df_long_3)
+    print(df_long_3.dtypes)